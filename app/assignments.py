@@ -0,0 +1,69 @@
+from sqlalchemy import and_, delete, exists, insert, select, update
+
+from app.constants import ASSIGNMENT_MODES
+from app.ids import chunked_ids
+from app.models import Employee, Project, employee_project_association
+
+
+def department_project_ids(session, department_id, project_ids):
+    """Return the subset of `project_ids` that belong to the department."""
+    found = set()
+    for chunk in chunked_ids(project_ids):
+        found.update(session.scalars(
+            select(Project.id).where(Project.department_id == department_id, Project.id.in_(chunk))
+        ))
+    return found
+
+
+def assign_department_to_projects(session, department_id, project_ids, mode='replace'):
+    """Link every employee of a department to each of `project_ids` with set-based SQL.
+
+    In 'additive' mode existing links are kept and only missing pairs are
+    inserted. In 'replace' mode the projects' current links are deleted first,
+    so each project ends up staffed by exactly the department's employees.
+    Returns (links removed, links added); the caller commits.
+    """
+    if mode not in ASSIGNMENT_MODES:
+        raise ValueError(f"Unknown assignment mode: {mode}")
+
+    association = employee_project_association
+    removed = added = 0
+    for chunk in chunked_ids(project_ids):
+        if mode == 'replace':
+            removed += session.execute(
+                delete(association).where(association.c.project_id.in_(chunk))
+            ).rowcount
+
+        already_linked = exists().where(and_(
+            association.c.employee_id == Employee.id,
+            association.c.project_id == Project.id,
+        ))
+        pairs = (
+            select(Employee.id, Project.id)
+            .join(Project, Project.id.in_(chunk))
+            .where(Employee.department_id == department_id, ~already_linked)
+        )
+        added += session.execute(
+            insert(association).from_select(['employee_id', 'project_id'], pairs)
+        ).rowcount
+    return removed, added
+
+
+def move_employees_to_department(session, department_id, employee_ids):
+    """Set the department of every existing employee in `employee_ids`.
+
+    Resolves the IDs with chunked IN queries and applies the change with one
+    UPDATE per chunk. Returns the sorted IDs that do not exist; the caller commits.
+    """
+    found = set()
+    for chunk in chunked_ids(employee_ids):
+        found.update(session.scalars(select(Employee.id).where(Employee.id.in_(chunk))))
+
+    for chunk in chunked_ids(sorted(found)):
+        session.execute(
+            update(Employee)
+            .where(Employee.id.in_(chunk))
+            .values(department_id=department_id)
+            .execution_options(synchronize_session=False)
+        )
+    return sorted(set(employee_ids) - found)
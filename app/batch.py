@@ -0,0 +1,392 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import groupby
+
+from sqlalchemy import bindparam, insert, select, update
+
+from app.assignments import assign_department_to_projects, move_employees_to_department
+from app.bulk import chunked, read_rows
+from app.constants import ASSIGNMENT_MODES, EMPLOYEE_REMOVAL_POLICIES, PROJECT_REMOVAL_POLICIES
+from app.ids import chunked_ids, format_id_ranges, parse_id_list
+from app.models import Department, Employee, Project
+from app.removal import remove_departments, remove_employees, remove_projects
+from app.transactions import write_transaction
+
+try:
+    import yaml
+except ImportError:  # only needed for YAML batch files
+    yaml = None
+
+REQUIRED = object()
+
+
+def _text(value):
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("expected a non-empty name")
+    return value.strip()
+
+
+def _new_name(value):
+    # Names of new rows follow the same rule as the interactive commands
+    name = _text(value)
+    if not name.isalpha():
+        raise ValueError(f"'{name}' should only contain alphabets")
+    return name
+
+
+def _id(value):
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise ValueError("expected a positive integer ID")
+    return value
+
+
+def _id_list(value):
+    # 12, [12, 14] or "10-20,25", as accepted by --ids on the command line
+    if isinstance(value, str):
+        return parse_id_list(value)
+    if isinstance(value, list):
+        return sorted({_id(item) for item in value})
+    return [_id(value)]
+
+
+def _choice(choices):
+    def parse(value):
+        if value not in choices:
+            raise ValueError(f"expected one of {', '.join(choices)}")
+        return value
+    return parse
+
+
+# The fields of each operation: field name -> (parser, default or REQUIRED).
+# Departments are referred to by name, employees and projects by ID.
+OPERATIONS = {
+    'add-department': {'name': (_new_name, REQUIRED)},
+    'remove-department': {
+        'name': (_text, REQUIRED),
+        'employees': (_choice(EMPLOYEE_REMOVAL_POLICIES), 'detach'),
+        'projects': (_choice(PROJECT_REMOVAL_POLICIES), 'detach'),
+        'reassign_to': (_text, None),
+    },
+    'add-employee': {'name': (_new_name, REQUIRED), 'department': (_text, None)},
+    'remove-employee': {'ids': (_id_list, REQUIRED)},
+    'add-project': {'name': (_new_name, REQUIRED), 'department': (_text, None)},
+    'remove-project': {'ids': (_id_list, REQUIRED)},
+    # A missing or null department detaches the employees
+    'move-employees': {'ids': (_id_list, REQUIRED), 'department': (_text, None)},
+    'assign-projects': {
+        'department': (_text, REQUIRED),
+        'projects': (_id_list, REQUIRED),
+        'mode': (_choice(ASSIGNMENT_MODES), 'replace'),  # the default of assign-projects-to-employees
+    },
+    'set-head': {'department': (_text, REQUIRED), 'employee': (_id, REQUIRED)},
+}
+
+
+@dataclass
+class Operation:
+    number: int  # line of a JSONL file or position in a YAML list
+    kind: str
+    fields: dict
+
+
+@dataclass
+class ChunkResult:
+    number: int
+    applied: Counter = field(default_factory=Counter)  # operations by kind
+    retries: int = 0  # times the chunk's transaction waited for another writer
+
+
+def read_operations(stream, input_format):
+    """Return (number, raw operation) pairs from a JSONL stream or a YAML list."""
+    if input_format == 'jsonl':
+        return list(read_rows(stream, 'jsonl'))
+    if input_format != 'yaml':
+        raise ValueError(f"Unsupported input format: {input_format}")
+    if yaml is None:
+        raise ValueError("YAML batch files need PyYAML (pip install pyyaml)")
+
+    document = yaml.safe_load(stream)
+    if isinstance(document, dict):
+        document = document.get('operations')
+    if document is None:
+        return []
+    if not isinstance(document, list):
+        raise ValueError("expected a list of operations, or a mapping with an 'operations' list")
+    return [
+        (number, item if isinstance(item, dict) else {'__error__': "expected a mapping"})
+        for number, item in enumerate(document, start=1)
+    ]
+
+
+def parse_operation(number, raw):
+    """Turn a raw mapping into an Operation; raises ValueError describing the problem."""
+    if '__error__' in raw:
+        raise ValueError(raw['__error__'])
+    kind = raw.get('op')
+    if not isinstance(kind, str) or kind not in OPERATIONS:
+        raise ValueError(f"unknown op {kind!r}; expected one of {', '.join(OPERATIONS)}")
+    spec = OPERATIONS[kind]
+    unknown = sorted(set(raw) - set(spec) - {'op'})
+    if unknown:
+        raise ValueError(f"unknown field {unknown[0]!r} for {kind}")
+
+    fields = {}
+    for name, (parse, default) in spec.items():
+        value = raw.get(name)
+        if value is None:
+            if default is REQUIRED:
+                raise ValueError(f"{kind} needs {name}")
+            fields[name] = default
+            continue
+        try:
+            fields[name] = parse(value)
+        except ValueError as e:
+            raise ValueError(f"{name}: {e}")
+    return Operation(number, kind, fields)
+
+
+def _referenced(operations):
+    """Department names, employee IDs and project IDs the operations refer to."""
+    names, employee_ids, project_ids = set(), set(), set()
+    for operation in operations:
+        fields = operation.fields
+        if operation.kind in ('add-department', 'remove-department'):
+            names.add(fields['name'])
+        names.update(fields[key] for key in ('department', 'reassign_to') if fields.get(key))
+        if operation.kind in ('remove-employee', 'move-employees'):
+            employee_ids.update(fields['ids'])
+        elif operation.kind == 'set-head':
+            employee_ids.add(fields['employee'])
+        elif operation.kind == 'remove-project':
+            project_ids.update(fields['ids'])
+        elif operation.kind == 'assign-projects':
+            project_ids.update(fields['projects'])
+    return names, employee_ids, project_ids
+
+
+def validate_batch(session, raw_operations):
+    """Parse and check every operation before anything is written.
+
+    Existence is checked with one IN query per kind and chunk of references,
+    then the operations are replayed in order against those sets, so an
+    operation may use a department added earlier in the batch but not one
+    removed earlier. Returns (operations, errors, department IDs by name),
+    where errors are (number, message) pairs.
+    """
+    operations, errors = [], []
+    for number, raw in raw_operations:
+        try:
+            operations.append(parse_operation(number, raw))
+        except ValueError as e:
+            errors.append((number, str(e)))
+
+    names, employee_ids, project_ids = _referenced(operations)
+    department_ids = {}
+    for chunk in chunked_ids(sorted(names)):
+        department_ids.update(session.execute(
+            select(Department.name, Department.id).where(Department.name.in_(chunk))
+        ).all())
+    employees = set()
+    for chunk in chunked_ids(sorted(employee_ids)):
+        employees.update(session.scalars(select(Employee.id).where(Employee.id.in_(chunk))))
+    # Project ID -> department name, to check assignments and let removed departments take their projects along
+    projects = {}
+    for chunk in chunked_ids(sorted(project_ids)):
+        projects.update(session.execute(
+            select(Project.id, Department.name).outerjoin(Project.department).where(Project.id.in_(chunk))
+        ).all())
+
+    departments = set(department_ids)
+    for operation in operations:
+        problems = _replay(operation, departments, employees, projects)
+        errors.extend((operation.number, problem) for problem in problems)
+    errors.sort(key=lambda error: error[0])
+    return operations, errors, department_ids
+
+
+def _replay(operation, departments, employees, projects):
+    """Check one operation against the simulated state and apply it there; returns problems."""
+    fields, problems = operation.fields, []
+
+    def require_department(name):
+        if name is not None and name not in departments:
+            problems.append(f"department '{name}' does not exist")
+
+    def require(ids, existing, kind):
+        missing = [id_ for id_ in ids if id_ not in existing]
+        if missing:
+            problems.append(f"{kind} {format_id_ranges(missing)} do not exist" if len(missing) > 1
+                            else f"{kind[:-1]} {missing[0]} does not exist")
+
+    kind = operation.kind
+    if kind == 'add-department':
+        if fields['name'] in departments:
+            problems.append(f"department '{fields['name']}' already exists")
+        departments.add(fields['name'])
+    elif kind == 'remove-department':
+        name, target = fields['name'], fields['reassign_to']
+        require_department(name)
+        reassigning = 'reassign' in (fields['employees'], fields['projects'])
+        if reassigning and target is None:
+            problems.append("reassign_to is needed to reassign employees or projects")
+        elif target is not None and not reassigning:
+            problems.append("reassign_to is only used when employees or projects are reassigned")
+        elif target == name:
+            problems.append(f"cannot reassign to department '{name}', which is being removed")
+        else:
+            require_department(target)
+        departments.discard(name)
+        for project_id, department in list(projects.items()):
+            if department == name:
+                if fields['projects'] == 'delete':
+                    del projects[project_id]
+                else:
+                    projects[project_id] = target if fields['projects'] == 'reassign' else None
+    elif kind in ('add-employee', 'add-project'):
+        require_department(fields['department'])
+    elif kind == 'remove-employee':
+        require(fields['ids'], employees, 'employees')
+        employees.difference_update(fields['ids'])
+    elif kind == 'remove-project':
+        require(fields['ids'], projects, 'projects')
+        for project_id in fields['ids']:
+            projects.pop(project_id, None)
+    elif kind == 'move-employees':
+        require_department(fields['department'])
+        require(fields['ids'], employees, 'employees')
+    elif kind == 'assign-projects':
+        require_department(fields['department'])
+        require(fields['projects'], projects, 'projects')
+        # Like the CLI, only the department's own projects can be assigned to it
+        foreign = [id_ for id_ in fields['projects'] if id_ in projects and projects[id_] != fields['department']]
+        if foreign:
+            problems.append(f"{'projects' if len(foreign) > 1 else 'project'} {format_id_ranges(foreign)} "
+                            f"not in department '{fields['department']}'")
+    elif kind == 'set-head':
+        require_department(fields['department'])
+        require([fields['employee']], employees, 'employees')
+    return problems
+
+
+def _add_departments(session, operations, department_ids):
+    names = [operation.fields['name'] for operation in operations]
+    session.execute(insert(Department.__table__), [{'name': name} for name in names])
+    for chunk in chunked_ids(names):
+        department_ids.update(session.execute(
+            select(Department.name, Department.id).where(Department.name.in_(chunk))
+        ).all())
+
+
+def _adder(entity):
+    def add(session, operations, department_ids):
+        session.execute(insert(entity.__table__), [
+            {'name': operation.fields['name'], 'department_id': department_ids.get(operation.fields['department'])}
+            for operation in operations
+        ])
+    return add
+
+
+def _remove_departments(session, operations, department_ids):
+    # Consecutive removals with the same policies share one set of statements
+    def policies(operation):
+        return operation.fields['employees'], operation.fields['projects'], operation.fields['reassign_to']
+
+    for (employees, projects, target), group in groupby(operations, key=policies):
+        ids = [department_ids.pop(operation.fields['name']) for operation in group]
+        remove_departments(session, ids, employees=employees, projects=projects,
+                           reassign_to=department_ids.get(target))
+
+
+def _remover(remove):
+    def apply(session, operations, department_ids):
+        remove(session, sorted({id_ for operation in operations for id_ in operation.fields['ids']}))
+    return apply
+
+
+def _move_employees(session, operations, department_ids):
+    for operation in operations:
+        move_employees_to_department(session, department_ids.get(operation.fields['department']), operation.fields['ids'])
+
+
+def _assign_projects(session, operations, department_ids):
+    for operation in operations:
+        fields = operation.fields
+        assign_department_to_projects(session, department_ids[fields['department']], fields['projects'], mode=fields['mode'])
+
+
+def _set_heads(session, operations, department_ids):
+    table = Department.__table__
+    session.execute(
+        update(table).where(table.c.id == bindparam('department')).values(head_of_department_id=bindparam('employee')),
+        [{'department': department_ids[operation.fields['department']], 'employee': operation.fields['employee']}
+         for operation in operations],
+    )
+
+
+APPLIERS = {
+    'add-department': _add_departments,
+    'remove-department': _remove_departments,
+    'add-employee': _adder(Employee),
+    'remove-employee': _remover(remove_employees),
+    'add-project': _adder(Project),
+    'remove-project': _remover(remove_projects),
+    'move-employees': _move_employees,
+    'assign-projects': _assign_projects,
+    'set-head': _set_heads,
+}
+
+
+def apply_operations(session, operations, department_ids):
+    """Apply validated operations in order; the caller commits.
+
+    Each run of consecutive operations of the same kind is applied together,
+    so a run of adds is one multi-row INSERT and a run of removals one set
+    of DELETEs per chunk of IDs. Returns the operations applied by kind.
+    """
+    applied = Counter()
+    for kind, run in groupby(operations, key=lambda operation: operation.kind):
+        run = list(run)
+        APPLIERS[kind](session, run, department_ids)
+        applied[kind] += len(run)
+    return applied
+
+
+def apply_batch(session, raw_operations):
+    """Validate and apply the whole batch in one write transaction.
+
+    Validation runs under the write lock, so no other writer can change the
+    rows it checked before the operations are applied: either every
+    operation is applied or none is. Returns (errors, operations applied by
+    kind, retries); nothing is written when there are errors.
+    """
+    def work():
+        operations, errors, department_ids = validate_batch(session, raw_operations)
+        if errors:
+            return errors, Counter()
+        return [], apply_operations(session, operations, department_ids)
+
+    (errors, applied), retries = write_transaction(session, work)
+    return errors, applied, retries
+
+
+def run_batch(session, operations, department_ids, chunk_size):
+    """Apply `operations` from validate_batch in transactions of `chunk_size`
+    operations, yielding a ChunkResult per transaction.
+
+    Each chunk is committed on its own, so an error stops the batch after the
+    chunks already committed. Other writers may change the database between
+    validation and a chunk; references they break fail that chunk's foreign
+    key checks.
+    """
+    for number, chunk in enumerate(chunked(operations, chunk_size), start=1):
+        # A retried transaction starts over from the IDs as they were before it
+        before = dict(department_ids)
+
+        def work():
+            ids = dict(before)
+            return apply_operations(session, chunk, ids), ids
+
+        (applied, ids), retries = write_transaction(session, work)
+        department_ids.clear()
+        department_ids.update(ids)
+        yield ChunkResult(number, applied, retries)
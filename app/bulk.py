@@ -0,0 +1,146 @@
+import csv
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.constants import IMPORTABLE_ENTITY_TYPES
+from app.models import Department, Employee, Project
+from app.transactions import write_transaction
+
+# Entities that can be bulk imported, keyed by the name used on the command line
+IMPORTABLE_ENTITIES = dict(zip(IMPORTABLE_ENTITY_TYPES, (Department, Employee, Project)))
+
+
+@dataclass
+class ChunkResult:
+    number: int
+    inserted: int = 0
+    rejects: list = field(default_factory=list)  # (line number, reason) tuples
+    retries: int = 0  # times the chunk's transaction waited for another writer
+
+
+def read_rows(stream, input_format):
+    """Yield (line number, row dict) pairs from a CSV or JSONL stream."""
+    if input_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif input_format == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = {'__error__': f"invalid JSON: {e}"}
+            if not isinstance(row, dict):
+                row = {'__error__': "expected a JSON object"}
+            yield line_number, row
+    else:
+        raise ValueError(f"Unsupported input format: {input_format}")
+
+
+def chunked(iterable, size):
+    """Yield lists of at most `size` items from `iterable`."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def department_ids_by_name(session):
+    return dict(session.execute(select(Department.name, Department.id)).all())
+
+
+def _prepare(entity, line_number, row, department_ids, seen_names):
+    """Turn a raw row into insert parameters, or return a reject reason."""
+    if '__error__' in row:
+        return None, row['__error__']
+    # JSONL values can be of any type; CSV cells are always strings
+    for column in ('name', 'department'):
+        if row.get(column) is not None and not isinstance(row[column], str):
+            return None, f"{column} must be a string"
+
+    name = (row.get('name') or '').strip()
+    if not name:
+        return None, "missing name"
+    if not name.isalpha():
+        # The same rule the interactive commands apply to names
+        return None, f"name '{name}' should only contain alphabets"
+
+    if entity is Department:
+        if name in seen_names:
+            return None, f"duplicate department name '{name}'"
+        seen_names.add(name)
+        return {'name': name}, None
+
+    params = {'name': name}
+    department_name = (row.get('department') or '').strip()
+    if department_name:
+        department_id = department_ids.get(department_name)
+        if department_id is None:
+            return None, f"unknown department '{department_name}'"
+        params['department_id'] = department_id
+    else:
+        params['department_id'] = None
+    return params, None
+
+
+def _insert_rows_individually(session, table, rows):
+    """Fallback for a chunk that hit a constraint: isolate the offending rows."""
+    inserted, rejects = 0, []
+    for line_number, params in rows:
+        try:
+            with session.begin_nested():
+                session.execute(insert(table), [params])
+            inserted += 1
+        except IntegrityError as ie:
+            rejects.append((line_number, f"integrity error: {ie.orig}"))
+    return inserted, rejects
+
+
+def _insert_chunk(session, table, rows):
+    try:
+        with session.begin_nested():
+            session.execute(insert(table), [params for _, params in rows])
+        return len(rows), []
+    except IntegrityError:
+        return _insert_rows_individually(session, table, rows)
+
+
+def bulk_import(session, entity, rows, batch_size=1000):
+    """Insert `rows` ((line number, dict) pairs) in chunks, one transaction each.
+
+    Department names are resolved to IDs once before the load starts. Rows that
+    cannot be inserted are reported in the yielded ChunkResult instead of
+    aborting the import.
+    """
+    table = entity.__table__
+    department_ids = department_ids_by_name(session)
+    # Department names already taken, so duplicates are rejected without hitting the constraint
+    seen_names = set(department_ids) if entity is Department else set()
+
+    for number, chunk in enumerate(chunked(rows, batch_size), start=1):
+        result = ChunkResult(number)
+        prepared = []
+        for line_number, row in chunk:
+            params, reason = _prepare(entity, line_number, row, department_ids, seen_names)
+            if reason:
+                result.rejects.append((line_number, reason))
+            else:
+                prepared.append((line_number, params))
+
+        if prepared:
+            (inserted, rejects), result.retries = write_transaction(
+                session, lambda: _insert_chunk(session, table, prepared)
+            )
+            result.inserted = inserted
+            result.rejects.extend(rejects)
+
+        yield result
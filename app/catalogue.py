@@ -0,0 +1,85 @@
+import io
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select
+
+from app.models import Department
+from app.output import output_format, write_pages
+from app.versions import data_version
+
+# Cached entries (the department rows, and one rendered listing per output format)
+# are dropped after this many seconds even if the departments did not change
+CATALOGUE_TTL = 300
+CATALOGUE_MAX_ENTRIES = 8
+
+
+class DepartmentCatalogue:
+    """Read-through cache of the department list behind the interactive prompts.
+
+    Holds the (id, name) rows, name/ID lookups built from them and the rendered
+    listing per output format. Each read compares the `departments` counter in
+    data_versions, which triggers bump on every department write, with the one
+    the entry was built from; a stale or expired entry is rebuilt. Entries are
+    evicted least recently used beyond `max_entries`.
+    """
+
+    def __init__(self, ttl=CATALOGUE_TTL, max_entries=CATALOGUE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (version, loaded at, value)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _get(self, session, key, load):
+        version = data_version(session, 'departments')
+        key = (str(session.get_bind().url), key)
+        entry = self._entries.get(key)
+        if entry is not None and version is not None and entry[0] == version and time.monotonic() - entry[1] < self.ttl:
+            self._entries.move_to_end(key)
+            return entry[2]
+
+        value = load()
+        self._entries[key] = (version, time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def _lookups(self, session):
+        def load():
+            rows = session.execute(select(Department.id, Department.name).order_by(Department.id)).all()
+            return rows, {name: department_id for department_id, name in rows}, dict(rows)
+        return self._get(session, 'rows', load)
+
+    def rows(self, session):
+        return self._lookups(session)[0]
+
+    def ids(self, session):
+        """Department IDs by name. Each lookup checks the version once, so resolve
+        many names through this mapping rather than repeated id_for calls."""
+        return self._lookups(session)[1]
+
+    def names(self, session):
+        """Department names by ID; the bulk counterpart of name_for."""
+        return self._lookups(session)[2]
+
+    def id_for(self, session, name):
+        return self.ids(session).get(name)
+
+    def name_for(self, session, department_id):
+        return self.names(session).get(department_id)
+
+    def listing(self, session):
+        """The departments rendered as an ID/Name table in the current output format."""
+        fmt = output_format()
+
+        def render():
+            stream = io.StringIO()
+            write_pages([self.rows(session)], ["ID", "Name"], fmt, stream)
+            return stream.getvalue()
+        return self._get(session, ('listing', fmt), render)
+
+
+catalogue = DepartmentCatalogue()
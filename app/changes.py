@@ -0,0 +1,109 @@
+import json
+
+from sqlalchemy import func, select, text
+
+from app.models import change_log
+from app.queries import keyset_pages
+
+# Logged tables: entity name -> (table, key columns, row columns)
+LOGGED = {
+    'department': ('departments', ('id',), ('id', 'name', 'head_of_department_id')),
+    'employee': ('employees', ('id',), ('id', 'name', 'department_id')),
+    'project': ('projects', ('id',), ('id', 'name', 'department_id')),
+    'assignment': ('employee_project_association', ('employee_id', 'project_id'), ('employee_id', 'project_id')),
+}
+OPERATIONS = ('insert', 'update', 'delete')
+
+
+def _json(record, columns):
+    return "json_object(" + ", ".join(f"'{column}', {record}.{column}" for column in columns) + ")"
+
+
+def _key(record, columns):
+    return " || ':' || ".join(f"{record}.{column}" for column in columns)
+
+
+def _log(entity, operation, record, columns):
+    key_columns = LOGGED[entity][1]
+    return (
+        f"INSERT INTO change_log (entity, entity_key, operation, row) "
+        f"VALUES ('{entity}', {_key(record, key_columns)}, '{operation}', {_json(record, columns)});"
+    )
+
+
+def _trigger_ddl(entity):
+    table, keys, columns = LOGGED[entity]
+    changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column in columns)
+    if keys == columns:
+        # A link has no other columns, so an update is a delete of the old link plus an insert
+        on_update = _log(entity, 'delete', 'old', keys) + "\n            " + _log(entity, 'insert', 'new', columns)
+    else:
+        on_update = _log(entity, 'update', 'new', columns)
+    return {
+        f"{table}_log_insert": f"""CREATE TRIGGER IF NOT EXISTS {table}_log_insert AFTER INSERT ON {table} BEGIN
+            {_log(entity, 'insert', 'new', columns)}
+        END""",
+        f"{table}_log_update": f"""CREATE TRIGGER IF NOT EXISTS {table}_log_update AFTER UPDATE ON {table}
+        WHEN {changed} BEGIN
+            {on_update}
+        END""",
+        f"{table}_log_delete": f"""CREATE TRIGGER IF NOT EXISTS {table}_log_delete AFTER DELETE ON {table} BEGIN
+            {_log(entity, 'delete', 'old', keys)}
+        END""",
+    }
+
+
+def create_change_triggers(connection):
+    for entity in LOGGED:
+        for ddl in _trigger_ddl(entity).values():
+            connection.exec_driver_sql(ddl)
+
+
+def drop_change_triggers(connection):
+    for entity in LOGGED:
+        for name in _trigger_ddl(entity):
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def latest_sequence(session):
+    # sqlite_sequence holds the last number AUTOINCREMENT handed out, which is
+    # still known when the log itself is empty, e.g. in a restored database
+    logged = session.scalar(select(func.max(change_log.c.seq))) or 0
+    issued = session.scalar(text("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")) or 0
+    return max(logged, issued)
+
+
+def change_pages(session, since=0, **paging):
+    """Pages of change-log rows with a sequence number above `since`, oldest first."""
+    statement = select(
+        change_log.c.seq, change_log.c.entity, change_log.c.operation, change_log.c.row, change_log.c.changed_at
+    )
+    return keyset_pages(session, statement, change_log.c.seq, after_id=since, **paging)
+
+
+def change_record(row):
+    seq, entity, operation, values, changed_at = row
+    return json.dumps({
+        'seq': seq, 'entity': entity, 'operation': operation,
+        'row': json.loads(values), 'changed_at': changed_at,
+    })
+
+
+def compact_changes(connection, before=None):
+    """Delete every entry up to sequence `before` (default: all) that a later
+    entry for the same row supersedes; returns the number deleted.
+
+    Entries carry the full row, so a consumer replaying the compacted log from
+    any sequence number, applying inserts and updates as upserts, reaches the
+    same state as with the full log. Deletes are kept as tombstones.
+    """
+    if before is None:
+        before = connection.scalar(select(func.max(change_log.c.seq))) or 0
+    latest = (
+        select(func.max(change_log.c.seq))
+        .where(change_log.c.seq <= before)
+        .group_by(change_log.c.entity, change_log.c.entity_key)
+    )
+    return connection.execute(
+        change_log.delete().where(change_log.c.seq <= before, change_log.c.seq.not_in(latest))
+    ).rowcount
@@ -0,0 +1,593 @@
+import os
+import time
+from collections import Counter
+
+import click
+from sqlalchemy.exc import IntegrityError
+
+from app import profiling
+from app.assignments import assign_department_to_projects, department_project_ids, move_employees_to_department
+from app.batch import apply_batch, read_operations, run_batch, validate_batch
+from app.bulk import IMPORTABLE_ENTITIES, bulk_import, read_rows
+from app.catalogue import catalogue
+from app.changes import change_pages, change_record, compact_changes, latest_sequence
+from app.database import create_schema, get_engine, session
+from app.graph import co_members, degrees, department_overlap, graph_for
+from app.ids import chunked_ids, format_id_ranges, parse_id_list
+from app.models import Department, Employee, Project
+from app.output import echo_error, echo_pages, echo_success, echo_table
+from app.queries import (
+    assignment_pages, available_employees_with_projects, employee_info, employees_in_department,
+    entity_pages, heads_of_departments, projects_by_department_pages,
+)
+from app.removal import matching_ids, remove_departments, remove_employees, remove_projects
+from app.search import search_available, search_names, suggest_names
+from app.stats import busiest_employees, check_stats, department_summary, rebuild_stats
+from app.shell import run_shell
+from app.snapshot import export_snapshot, restore_snapshot
+from app.transactions import write_transaction
+
+
+def write(work):
+    # Commit the writes in `work` as one transaction, waiting out other writers
+    result, retries = write_transaction(session, work)
+    if retries:
+        click.echo(f"The database was busy; committed after {retries} retries.", err=True)
+    return result
+
+def add_entity(entity, name, **kwargs):
+    try:
+        def insert():
+            new_entity = entity(name=name, **kwargs)
+            session.add(new_entity)
+            return new_entity
+        new_entity = write(insert)
+        echo_success(f"Added {entity.__name__.lower()}: {name}")
+        display_entities(entity)
+        return new_entity  # Return the newly added entity
+    except IntegrityError as ie:
+        session.rollback()  # Rollback the session to avoid leaving the transaction open
+        echo_error(f"IntegrityError: {str(ie)}")
+        echo_error(f"{entity.__name__.lower()} with name '{name}' already exists. Please choose a different name.")
+        return None  # Return None on IntegrityError
+    except Exception as e:
+        session.rollback()  # Rollback the session in case of other exceptions
+        echo_error(f"Error adding {entity.__name__.lower()}: {str(e)}")
+        return None  # Return None on other exceptions
+
+# Remove Entity Function
+REMOVERS = {Department: remove_departments, Employee: remove_employees, Project: remove_projects}
+
+def remove_entity(entity, name, prompt_id=False, ids=None, pattern=None, assume_yes=False, **policies):
+    kind = entity.__name__.lower()
+    try:
+        bulk = ids is not None or pattern is not None
+        if prompt_id and not bulk:
+            # Show the entries matching the name so the right one can be picked by ID
+            matches = session.query(entity.id, entity.name).filter_by(name=name).all() or suggest_names(session, kind, name)
+            if matches:
+                echo_table(matches, ["ID", "Name"])
+            entity_id = click.prompt(f'Enter the ID of the {kind} to remove', type=click.IntRange(1))
+            entity_ids = matching_ids(session, entity, ids=[entity_id])
+        else:
+            entity_ids = matching_ids(session, entity, name=name, pattern=pattern, ids=ids)
+
+        if not entity_ids:
+            if bulk:
+                echo_error(f"No {kind}s matched")
+            else:
+                echo_error(f"{kind} with name '{name}' not found{did_you_mean(entity, name)}")
+            return
+
+        if bulk and not assume_yes:
+            preview = session.query(entity.id, entity.name).filter(entity.id.in_(entity_ids[:10])).all()
+            echo_table(preview, ["ID", "Name"])
+            more = f" and {len(entity_ids) - len(preview)} more" if len(entity_ids) > len(preview) else ""
+            plural = kind if len(entity_ids) == 1 else f"{kind}s"
+            if not click.confirm(f"Remove {len(entity_ids)} {plural} (IDs {format_id_ranges(entity_ids)}){more}?"):
+                click.echo("Nothing removed.")
+                return
+
+        removed_name = session.get(entity, entity_ids[0]).name if len(entity_ids) == 1 else None
+        result = write(lambda: REMOVERS[entity](session, entity_ids, **policies))
+
+        if removed_name is not None:
+            echo_success(f"Removed {kind}: {removed_name}")
+        else:
+            echo_success(f"Removed {result.removed} {kind}s")
+        if entity is Department:
+            moved = 'reassigned' if policies.get('employees') == 'reassign' else 'detached'
+            click.echo(f"{result.employees_moved} employees {moved}")
+            if policies.get('projects') == 'delete':
+                click.echo(f"{result.projects_deleted} projects deleted with {result.links_deleted} employee links")
+            else:
+                moved = 'reassigned' if policies.get('projects') == 'reassign' else 'detached'
+                click.echo(f"{result.projects_moved} projects {moved}")
+        elif result.links_deleted:
+            click.echo(f"{result.links_deleted} project assignments removed")
+        if not bulk:
+            display_entities(entity)
+    except Exception as e:
+        session.rollback()
+        echo_error(f"Error removing {kind}: {str(e)}")
+
+def did_you_mean(entity, name):
+    suggestions = suggest_names(session, entity.__name__.lower(), name, limit=3)
+    if not suggestions:
+        return ""
+    return ". Did you mean: " + ", ".join(match for _, match in suggestions) + "?"
+
+def display_entities(entity, **paging):
+    try:
+        pages = entity_pages(session, entity, **paging)
+        if not echo_pages(pages, headers=["ID", "Name"]):
+            click.echo(f"No {entity.__name__.lower()}s found")
+    except Exception as e:
+        echo_error(f"Error displaying {entity.__name__.lower()}s: {str(e)}")
+
+def echo_departments():
+    # Print the cached department listing; returns False if there are no departments
+    if not catalogue.rows(session):
+        return False
+    click.echo(catalogue.listing(session), nl=False)
+    return True
+
+def get_available_employees():
+    return session.query(Employee).filter(Employee.department_id.is_(None)).all()
+
+def add_employees_to_department(department_id=None, employee_ids=None):
+    try:
+        if department_id is None:
+            # Display the departments table for the user to select
+            if not echo_departments():
+                click.echo("No departments found. Please add a department first.")
+                return
+
+            # Prompt user to select a department
+            department_id = click.prompt('Choose a department ID to add employees to', type=int)
+        department_name = catalogue.name_for(session, department_id)
+
+        if department_name is None:
+            click.secho(f"Department with ID {department_id} not found.", fg='red')
+            return
+
+        if employee_ids is None:
+            # Filter employees not assigned to any departments
+            available_employees = available_employees_with_projects(session)
+
+            if not available_employees:
+                click.secho("No available employees to add to the department.", fg='red')
+                return
+
+            # Display the table of employees not assigned to any departments
+            echo_table(available_employees, ["ID", "Name", "Projects"])
+
+            # Prompt user to select employee IDs to add (comma-separated, ranges allowed)
+            employee_ids_str = click.prompt('Enter the IDs of the employees to add (e.g. 1-500,720)', type=str)
+            try:
+                employee_ids = parse_id_list(employee_ids_str)
+            except ValueError as e:
+                click.secho(f"Invalid employee IDs: {e}", fg='red')
+                return
+
+        # Add selected employees to the department
+        missing_ids = write(lambda: move_employees_to_department(session, department_id, employee_ids))
+
+        if missing_ids:
+            click.secho(f"Employees with IDs {format_id_ranges(missing_ids)} not found.", fg='red')
+        moved = len(employee_ids) - len(missing_ids)
+        click.secho(f"{moved} employees added to department {department_name}", fg='green')
+
+    except Exception as e:
+        session.rollback()
+        click.secho(f"Error adding employees to department: {str(e)}", fg='red')
+   
+
+def assign_projects_to_employees_in_department(department_id=None, project_ids=None, mode='replace'):
+    try:
+        if department_id is None:
+            # Display the departments table for the user to select
+            if not echo_departments():
+                click.echo("No departments found. Please add a department first.")
+                return
+
+            # Prompt user to select a department
+            department_id = click.prompt('Choose a department ID to assign projects to employees', type=int)
+        department_name = catalogue.name_for(session, department_id)
+
+        if department_name is None:
+            click.secho(f"Department with ID {department_id} not found.", fg='red')
+            return
+
+        if project_ids is None:
+            # Display the projects table for the user to select
+            projects = session.query(Project.id, Project.name).filter_by(department_id=department_id).all()
+
+            if not projects:
+                click.echo(f"No projects found in Department: {department_name}. Please add a project first.")
+                return
+
+            echo_table(projects, ["ID", "Name"])
+
+            # Prompt user to select project IDs to assign (comma-separated, ranges allowed)
+            project_ids_str = click.prompt('Enter the IDs of the projects to assign (e.g. 1,4-7)', type=str)
+            project_ids = parse_id_list(project_ids_str)
+
+        found_ids = department_project_ids(session, department_id, project_ids)
+        for project_id in sorted(set(project_ids) - found_ids):
+            click.secho(f"Project with ID {project_id} not found in Department: {department_name}.", fg='red')
+
+        # Assign the selected projects to every employee in the department in one statement
+        removed, added = write(lambda: assign_department_to_projects(session, department_id, sorted(found_ids), mode=mode))
+
+        click.secho(f"Projects assigned to employees in department {department_name} ({added} links added, {removed} removed)", fg='green')
+
+    except Exception as e:
+        session.rollback()
+        click.secho(f"Error assigning projects to employees in department: {str(e)}", fg='red')
+        
+# Function to view the employee info
+def view_employee_info():
+    try:
+        # Prompt user to enter their employee ID
+        employee_id = click.prompt('Enter your employee ID', type=int)
+        info = employee_info(session, employee_id)
+
+        if info is None:
+            echo_error(f"Employee with ID {employee_id} not found.")
+            return
+
+        # Display information about the employee's department
+        department_name, projects = info
+        if department_name:
+            echo_success(f"You are part of the '{department_name}' department.")
+
+            # Display projects assigned to the employee
+            if projects:
+                echo_table(projects, ["Project ID", "Project Name"])
+            else:
+                echo_success("You are not assigned to any projects.")
+        else:
+            echo_success("You are not assigned to any department.")
+
+    except Exception as e:
+        echo_error(f"Error viewing employee information: {str(e)}")
+
+
+# Creating the database schema
+def init_db():
+    try:
+        create_schema(get_engine())
+        echo_success("Database schema is up to date")
+    except Exception as e:
+        echo_error(f"Error creating database schema: {str(e)}")
+
+# Adding a Department
+def add_department(name):
+    try:
+        existing_department = session.query(Department).filter_by(name=name).first()
+        if existing_department:
+            echo_error(f"Department with name '{name}' already exists. Please choose a different name.")
+        else:
+            new_department = add_entity(Department, name)
+            if new_department:
+                add_employees_to_department(new_department.id)
+    except Exception as e:
+        echo_error(f"Error adding department: {str(e)}")
+
+# Adding an Employee
+def add_employee(name):
+    try:
+        if not echo_departments():
+            echo_error("No available departments to assign the employee to.")
+            add_entity(Employee, name)  # Add the employee without assigning to any department
+        else:
+            add_to_department = click.confirm('Do you want to add the employee to a department?', default=True)
+
+            if add_to_department:
+                department_name = click.prompt('Choose a department name to assign the employee to', type=str)
+
+                department_id = catalogue.id_for(session, department_name)
+                if department_id is not None:
+                    add_entity(Employee, name, department_id=department_id)
+                else:
+                    echo_error(f"Department '{department_name}' not found.")
+            else:
+                add_entity(Employee, name)  # Add the employee without assigning to any department
+
+    except Exception as e:
+        echo_error(f"Error adding employee: {str(e)}")
+
+# Adding a Project
+def add_project(name):
+    try:
+        if echo_departments():
+            department_name = click.prompt('Choose a department name to assign the project to', type=str)
+
+            department_id = catalogue.id_for(session, department_name)
+            if department_id is not None:
+                add_entity(Project, name, department_id=department_id)
+            else:
+                echo_error(f"Department '{department_name}' not found.")
+        else:
+            echo_error("No departments found. Please add a department first.")
+    except Exception as e:
+        echo_error(f"Error adding project: {str(e)}")
+
+# Displaying Head of Departments and Their Departments
+def display_heads_of_departments():
+    try:
+        data = heads_of_departments(session)
+        if data:
+            echo_table(data, ["Head of Department", "Department Name"])
+        else:
+            click.echo("No head of departments found")
+    except Exception as e:
+        echo_error(f"Error displaying heads of departments: {str(e)}")
+
+# Displaying Employees in a Certain Department
+def display_employees_in_department(department_name):
+    try:
+        found, employees = employees_in_department(session, department_name)
+        if found:
+            if employees:
+                echo_table(employees, ["Employee ID", "Employee Name"])
+            else:
+                echo_success(f"No employees found in Department: {department_name}")
+        else:
+            echo_error(f"Department: {department_name} not found{did_you_mean(Department, department_name)}")
+    except Exception as e:
+        echo_error(f"Error displaying employees in department: {str(e)}")
+
+# Displaying Projects Being Worked on by Departments
+def display_projects_by_departments(**paging):
+    try:
+        pages = projects_by_department_pages(session, **paging)
+        if not echo_pages(pages, headers=["Project ID", "Department Name", "Project Name"]):
+            echo_success("No projects found in any department")
+    except Exception as e:
+        echo_error(f"Error displaying projects by departments: {str(e)}")
+
+# Displaying Employee-Project Assignments
+def display_assignments(page_size, limit):
+    try:
+        pages = assignment_pages(session, page_size=page_size, limit=limit)
+        if not echo_pages(pages, headers=["Employee ID", "Project ID"]):
+            echo_success("No employees are assigned to projects")
+    except Exception as e:
+        echo_error(f"Error displaying assignments: {str(e)}")
+
+# Searching names of departments, employees and projects
+def search(query, kinds, fuzzy, limit):
+    try:
+        if not search_available(session):
+            echo_error("Name search is unavailable: this SQLite build has no FTS5 trigram tokenizer. Run init-db after upgrading SQLite.")
+            return
+        matches = search_names(session, query, kinds, fuzzy=fuzzy, limit=limit)
+        if not echo_table(matches, ["Kind", "ID", "Name"]):
+            click.echo(f"No names matching '{query}' found")
+    except Exception as e:
+        echo_error(f"Error searching: {str(e)}")
+
+# Headcount and project load per department, read from the summary tables
+def display_stats(top):
+    try:
+        if not echo_table(department_summary(session), ["Department", "Employees", "Projects"]):
+            click.echo("No departments found")
+        if top:
+            click.echo()
+            if not echo_table(busiest_employees(session, top), ["Employee ID", "Employee Name", "Projects"]):
+                click.echo("No employees are assigned to projects")
+    except Exception as e:
+        echo_error(f"Error displaying stats: {str(e)}")
+
+def rebuild_summary_tables():
+    try:
+        write(lambda: rebuild_stats(session.connection()))
+        echo_success("Summary tables rebuilt successfully!")
+    except Exception as e:
+        echo_error(f"Error rebuilding stats: {str(e)}")
+
+def check_summary_tables(repair):
+    try:
+        def check_and_repair():
+            mismatches = check_stats(session.connection())
+            if mismatches:
+                rebuild_stats(session.connection())
+            return mismatches
+        # Only a repair needs the write lock
+        mismatches = write(check_and_repair) if repair else check_stats(session.connection())
+        if not mismatches:
+            echo_success("Summary tables are consistent.")
+            return
+        echo_table(mismatches, ["Table", "Key", "Stored", "Computed"])
+        if repair:
+            echo_success(f"Repaired {len(mismatches)} inconsistent rows.")
+        else:
+            echo_error(f"Found {len(mismatches)} inconsistent rows; run rebuild-stats or check-stats --repair.")
+    except Exception as e:
+        echo_error(f"Error checking stats: {str(e)}")
+
+# Streaming the change log as JSONL for incremental sync
+def display_changes(since, limit, page_size, latest):
+    try:
+        if latest:
+            click.echo(latest_sequence(session))
+            return
+        for page in profiling.timed_pages(change_pages(session, since, page_size=page_size, limit=limit)):
+            with profiling.phase('render'):
+                click.echo('\n'.join(change_record(row) for row in page))
+    except Exception as e:
+        echo_error(f"Error reading changes: {str(e)}")
+
+def compact_change_log(before):
+    try:
+        removed = write(lambda: compact_changes(session.connection(), before))
+        echo_success(f"Compacted the change log: {removed} superseded entries removed.")
+    except Exception as e:
+        echo_error(f"Error compacting changes: {str(e)}")
+
+# Relationship analysis over the in-memory employee-project graph
+def _employee_names(employee_ids):
+    names = {}
+    for chunk in chunked_ids(employee_ids):
+        names.update(session.query(Employee.id, Employee.name).filter(Employee.id.in_(chunk)).all())
+    return names
+
+def analyze_co_members(cache_path, employee_id, limit):
+    try:
+        rows = co_members(graph_for(session, cache_path), employee_id)
+        if rows is None:
+            echo_error(f"Employee with ID {employee_id} not found")
+            return
+        rows = rows[:limit]
+        names = _employee_names([member for member, _ in rows])
+        data = [(member, names.get(member), shared) for member, shared in rows]
+        if not echo_table(data, ["Employee ID", "Employee Name", "Shared Projects"]):
+            click.echo(f"Employee {employee_id} shares no projects with anyone")
+    except Exception as e:
+        echo_error(f"Error analyzing co-members: {str(e)}")
+
+def analyze_degrees(cache_path, min_projects, limit):
+    try:
+        rows = degrees(graph_for(session, cache_path), min_projects)[:limit]
+        names = _employee_names([employee_id for employee_id, _, _ in rows])
+        departments = catalogue.names(session)
+        data = [
+            (employee_id, names.get(employee_id), departments.get(department_id), count)
+            for employee_id, department_id, count in rows
+        ]
+        if not echo_table(data, ["Employee ID", "Employee Name", "Department", "Projects"]):
+            click.echo(f"No employees are on {min_projects} or more projects")
+    except Exception as e:
+        echo_error(f"Error analyzing project counts: {str(e)}")
+
+def analyze_department_overlap(cache_path, limit):
+    try:
+        rows = department_overlap(graph_for(session, cache_path), limit)
+        departments = catalogue.names(session)
+        data = [
+            (departments.get(first), departments.get(second), shared)
+            for first, second, shared in rows
+        ]
+        if not echo_table(data, ["Department", "Department", "Shared Projects"]):
+            click.echo("No projects are shared between departments")
+    except Exception as e:
+        echo_error(f"Error analyzing department overlap: {str(e)}")
+
+# Exporting the database to sharded files and restoring it into a new database
+def _database_path():
+    path = get_engine().url.database
+    if not path or path == ':memory:':
+        raise ValueError("Only file databases can be exported.")
+    return path
+
+def export_database(directory, partition_size, workers):
+    started = time.perf_counter()
+    try:
+        manifest = export_snapshot(_database_path(), directory, partition_size, workers)
+        elapsed = time.perf_counter() - started
+        total = 0
+        for table, details in manifest['tables'].items():
+            click.echo(f"{table}: {details['rows']} rows in {len(details['shards'])} shards")
+            total += details['rows']
+        echo_success(f"Exported {total} rows to {directory} in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s), "
+                     f"up to change {manifest['change_seq']}")
+    except Exception as e:
+        echo_error(f"Error exporting: {str(e)}")
+
+def restore_database(directory, database, workers):
+    started = time.perf_counter()
+    try:
+        counts = restore_snapshot(directory, database, workers)
+        elapsed = time.perf_counter() - started
+        for table, count in counts.items():
+            click.echo(f"{table}: {count} rows")
+        total = sum(counts.values())
+        echo_success(f"Restored {total} rows into {database} in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    except Exception as e:
+        echo_error(f"Error restoring: {str(e)}")
+
+# Bulk importing departments, employees or projects from a CSV/JSONL file
+def import_entities(entity_type, source, input_format, batch_size):
+    if input_format is None:
+        extension = os.path.splitext(source.name)[1].lower()
+        input_format = 'jsonl' if extension in ('.jsonl', '.json') else 'csv'
+
+    entity = IMPORTABLE_ENTITIES[entity_type]
+    started = time.perf_counter()
+    total_inserted = total_rejected = 0
+    try:
+        rows = read_rows(source, input_format)
+        for chunk in bulk_import(session, entity, rows, batch_size=batch_size):
+            total_inserted += chunk.inserted
+            total_rejected += len(chunk.rejects)
+            waited = f" (committed after {chunk.retries} retries)" if chunk.retries else ""
+            click.echo(f"Chunk {chunk.number}: inserted {chunk.inserted}, rejected {len(chunk.rejects)}{waited}")
+            for line_number, reason in chunk.rejects:
+                echo_error(f"  line {line_number}: {reason}")
+    except Exception as e:
+        session.rollback()
+        echo_error(f"Error importing {entity_type}: {str(e)}")
+
+    elapsed = time.perf_counter() - started
+    rate = (total_inserted + total_rejected) / elapsed if elapsed else 0
+    echo_success(f"Imported {total_inserted} {entity_type}, rejected {total_rejected} ({rate:,.0f} rows/s)")
+
+# Applying a file of operations, validated up front, in one or a few transactions
+def _report_batch_errors(errors, total, unit):
+    for number, message in errors:
+        echo_error(f"{unit} {number}: {message}")
+    echo_error(f"Found {len(errors)} problems in {total} operations; nothing was applied.")
+
+def run_operations(source, input_format, chunk_size, dry_run):
+    if input_format is None:
+        extension = os.path.splitext(source.name)[1].lower()
+        input_format = 'yaml' if extension in ('.yaml', '.yml') else 'jsonl'
+    unit = 'item' if input_format == 'yaml' else 'line'
+
+    started = time.perf_counter()
+    try:
+        raw_operations = read_operations(source, input_format)
+    except Exception as e:
+        echo_error(f"Error reading batch: {str(e)}")
+        return
+    if not raw_operations:
+        click.echo("No operations to apply")
+        return
+
+    applied = Counter()
+    try:
+        if dry_run or chunk_size:
+            operations, errors, department_ids = validate_batch(session, raw_operations)
+            session.rollback()  # end the read transaction before taking the write lock
+            if errors:
+                _report_batch_errors(errors, len(raw_operations), unit)
+                return
+            if dry_run:
+                echo_success(f"All {len(operations)} operations are valid; nothing was applied (dry run).")
+                return
+            for chunk in run_batch(session, operations, department_ids, chunk_size):
+                applied.update(chunk.applied)
+                waited = f" (committed after {chunk.retries} retries)" if chunk.retries else ""
+                click.echo(f"Chunk {chunk.number}: applied {chunk.applied.total()} operations{waited}")
+        else:
+            errors, applied, retries = apply_batch(session, raw_operations)
+            if errors:
+                _report_batch_errors(errors, len(raw_operations), unit)
+                return
+            if retries:
+                click.echo(f"The database was busy; committed after {retries} retries.", err=True)
+    except Exception as e:
+        session.rollback()
+        echo_error(f"Error applying batch: {str(e)}")
+        if not applied:
+            echo_error("Nothing was applied.")
+        else:
+            echo_error(f"The first {applied.total()} operations were committed; the rest were not applied.")
+        return
+
+    elapsed = time.perf_counter() - started
+    echo_table(sorted(applied.items()), ["Operation", "Count"])
+    rate = applied.total() / elapsed if elapsed else 0
+    echo_success(f"Applied {applied.total()} operations ({rate:,.0f} operations/s)")
@@ -0,0 +1,17 @@
+# Values the CLI needs to declare its options. Kept free of SQLAlchemy imports so
+# that `main.py --help` does not have to load the ORM.
+
+DEFAULT_PAGE_SIZE = 500
+
+ASSIGNMENT_MODES = ('additive', 'replace')
+
+IMPORTABLE_ENTITY_TYPES = ('departments', 'employees', 'projects')
+
+SEARCH_KINDS = ('department', 'employee', 'project')
+
+# Rows per shard written by `export`
+DEFAULT_PARTITION_SIZE = 100_000
+
+# What happens to a removed department's employees and projects
+EMPLOYEE_REMOVAL_POLICIES = ('detach', 'reassign')
+PROJECT_REMOVAL_POLICIES = ('detach', 'reassign', 'delete')
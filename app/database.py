@@ -1,8 +1,126 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import os
 
-DATABASE_URI = "sqlite:///database.db"
-engine = create_engine(DATABASE_URI)
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 
-Session = sessionmaker(bind=engine)
-session = Session()
+from app.changes import create_change_triggers
+from app.models import Base
+from app.search import create_search_index
+from app.stats import create_stats_triggers
+from app.versions import create_version_triggers
+
+DATABASE_URI = os.environ.get('EMS_DATABASE_URI', "sqlite:///database.db")
+
+# Connection-level SQLite settings applied by each engine profile. `default` keeps
+# SQLite's own behaviour (rollback journal, synchronous=FULL); `tuned` uses WAL so
+# readers are not blocked by a writer and commits fsync once instead of twice.
+PROFILES = {
+    'default': {},
+    'tuned': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,  # negative values are KiB, so 64 MiB
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,  # milliseconds
+    },
+}
+DEFAULT_PROFILE = 'tuned'
+
+
+def profile_pragmas(profile, environ=os.environ):
+    """Return the pragmas for `profile`, with EMS_SQLITE_<PRAGMA> environment overrides."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown database profile '{profile}', expected one of: {', '.join(PROFILES)}")
+    pragmas = dict(PROFILES[profile])
+    for pragma in PROFILES['tuned']:
+        override = environ.get(f"EMS_SQLITE_{pragma.upper()}")
+        if override:
+            pragmas[pragma] = override
+    return pragmas
+
+
+def create_database_engine(uri=DATABASE_URI, profile=None):
+    profile = profile or os.environ.get('EMS_DB_PROFILE', DEFAULT_PROFILE)
+    pragmas = profile_pragmas(profile)
+
+    in_memory = uri in ('sqlite://', 'sqlite:///:memory:')
+    # An in-memory database only exists on its one connection; a file database keeps
+    # a small pool so connections (and their pragmas) are reused within a process
+    pool_options = {'poolclass': StaticPool} if in_memory else {'poolclass': QueuePool, 'pool_size': 5}
+    engine = create_engine(uri, connect_args={'check_same_thread': False}, **pool_options)
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        # pysqlite would otherwise begin transactions itself, always DEFERRED and
+        # only before writes; `begin` below takes over (SQLAlchemy's documented recipe)
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        # Not a tuning knob: the models' ON DELETE rules depend on it in every profile
+        cursor.execute("PRAGMA foreign_keys=ON")
+        for pragma, value in pragmas.items():
+            if in_memory and pragma in ('journal_mode', 'mmap_size'):
+                continue
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def begin(connection):
+        # Writers ask for IMMEDIATE (see app/transactions.py) to take the write lock up front
+        connection.exec_driver_sql(f"BEGIN {connection.get_execution_options().get('sqlite_begin', 'DEFERRED')}")
+
+    return engine
+
+
+# Stored in the database's PRAGMA user_version; bump it whenever the models gain
+# tables or indexes so existing databases pick them up on their next run
+SCHEMA_VERSION = 6
+
+
+def create_schema(engine):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        create_search_index(connection)
+        create_stats_triggers(connection)
+        create_change_triggers(connection)
+        create_version_triggers(connection)
+        connection.exec_driver_sql(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+
+def ensure_schema(engine):
+    """Create the schema only if this database has not been initialised yet."""
+    with engine.connect() as connection:
+        version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+    if version < SCHEMA_VERSION:
+        create_schema(engine)
+
+
+_engine = None
+
+
+def get_engine():
+    """Return the process-wide engine, creating it (and checking the schema) on first use."""
+    global _engine
+    if _engine is None:
+        _engine = create_database_engine()
+        ensure_schema(_engine)
+    return _engine
+
+
+def set_engine(engine):
+    """Point the session at `engine` instead of EMS_DATABASE_URI, e.g. for benchmarks."""
+    global _engine
+    session.remove()
+    _engine = engine
+
+
+Session = sessionmaker()
+
+
+def _new_session():
+    return Session(bind=get_engine())
+
+
+# Each CLI command gets its own session, removed when the command finishes
+session = scoped_session(_new_session)
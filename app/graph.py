@@ -0,0 +1,266 @@
+import bisect
+import heapq
+import itertools
+import mmap
+import os
+import struct
+from array import array
+from collections import Counter
+
+from sqlalchemy import select
+
+from app.models import Employee, Project, employee_project_association
+from app.versions import data_version
+
+try:
+    import numpy
+except ImportError:  # the pure-Python paths give the same answers, only slower
+    numpy = None
+
+CACHE_MAGIC = b'EMSGRAPH'
+CACHE_FORMAT_VERSION = 1
+# magic, format version, employees version, association version, employees, projects, links
+CACHE_HEADER = struct.Struct('<8s6q')
+FETCH_SIZE = 10_000
+
+
+class ProjectGraph:
+    """Employee-project links as compressed sparse rows, in both directions.
+
+    Employees and projects are addressed by dense indexes into the sorted
+    `employee_ids` and `project_ids`. The projects of employee i are
+    `employee_projects[employee_offsets[i]:employee_offsets[i + 1]]` (project
+    indexes), and likewise `project_employees` / `project_offsets` hold the
+    employees of each project. Every sequence is an `array('q')` or a
+    memoryview over a cache file, so no ORM objects are involved.
+    """
+
+    ARRAYS = ('employee_ids', 'employee_departments', 'employee_offsets', 'employee_projects',
+              'project_ids', 'project_offsets', 'project_employees')
+
+    def __init__(self, **arrays):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @property
+    def link_count(self):
+        return len(self.employee_projects)
+
+    def employee_index(self, employee_id):
+        index = bisect.bisect_left(self.employee_ids, employee_id)
+        if index < len(self.employee_ids) and self.employee_ids[index] == employee_id:
+            return index
+        return None
+
+    def projects_of(self, index):
+        return self.employee_projects[self.employee_offsets[index]:self.employee_offsets[index + 1]]
+
+    def employees_of(self, project_index):
+        return self.project_employees[self.project_offsets[project_index]:self.project_offsets[project_index + 1]]
+
+
+def _offsets(counts):
+    offsets = array('q', [0])
+    offsets.extend(itertools.accumulate(counts))
+    return offsets
+
+
+def build_graph(session):
+    """Read the employees, projects and association table once into a ProjectGraph."""
+    employee_ids, employee_departments = array('q'), array('q')
+    statement = select(Employee.id, Employee.department_id).order_by(Employee.id)
+    for employee_id, department_id in session.execute(statement.execution_options(yield_per=FETCH_SIZE)):
+        employee_ids.append(employee_id)
+        employee_departments.append(department_id or 0)
+
+    project_ids = array('q', session.scalars(select(Project.id).order_by(Project.id)))
+    project_index = {project_id: index for index, project_id in enumerate(project_ids)}
+
+    # The primary key returns links grouped by employee, in employee order
+    association = employee_project_association
+    statement = select(association.c.employee_id, association.c.project_id).order_by(
+        association.c.employee_id, association.c.project_id
+    )
+    link_employees, employee_projects = array('q'), array('q')
+    employee_counts = array('q', bytes(8 * len(employee_ids)))
+    index = 0
+    for employee_id, project_id in session.execute(statement.execution_options(yield_per=FETCH_SIZE)):
+        while index < len(employee_ids) and employee_ids[index] < employee_id:
+            index += 1
+        target = project_index.get(project_id)
+        if index == len(employee_ids) or employee_ids[index] != employee_id or target is None:
+            continue  # link to a row that no longer exists
+        link_employees.append(index)
+        employee_projects.append(target)
+        employee_counts[index] += 1
+
+    # Transpose with a counting sort to get the project -> employees rows
+    if numpy is not None:
+        projects = numpy.frombuffer(employee_projects, dtype=numpy.int64)
+        order = numpy.argsort(projects, kind='stable')
+        project_employees = array('q', numpy.frombuffer(link_employees, dtype=numpy.int64)[order].tobytes())
+        project_offsets = _offsets(numpy.bincount(projects, minlength=len(project_ids)).tolist())
+    else:
+        project_counts = array('q', bytes(8 * len(project_ids)))
+        for target in employee_projects:
+            project_counts[target] += 1
+        project_offsets = _offsets(project_counts)
+        cursor = array('q', project_offsets[:-1])
+        project_employees = array('q', bytes(8 * len(employee_projects)))
+        for employee, target in zip(link_employees, employee_projects):
+            project_employees[cursor[target]] = employee
+            cursor[target] += 1
+
+    return ProjectGraph(
+        employee_ids=employee_ids, employee_departments=employee_departments,
+        employee_offsets=_offsets(employee_counts), employee_projects=employee_projects,
+        project_ids=project_ids, project_offsets=project_offsets, project_employees=project_employees,
+    )
+
+
+def data_stamp(session):
+    """Write counters the graph depends on, or None if this database has none."""
+    stamp = (data_version(session, 'employees'), data_version(session, 'employee_project_association'))
+    return None if None in stamp else stamp
+
+
+def save_graph(graph, path, stamp):
+    """Write the graph's arrays after a fixed header; replaced atomically."""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_FORMAT_VERSION, *stamp,
+                                  len(graph.employee_ids), len(graph.project_ids), graph.link_count))
+        for name in ProjectGraph.ARRAYS:
+            getattr(graph, name).tofile(f)
+    os.replace(temporary, path)
+
+
+def load_graph(path, stamp):
+    """Map a cache file written by save_graph; returns None if it is missing or stale."""
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        header = f.read(CACHE_HEADER.size)
+        if len(header) < CACHE_HEADER.size:
+            return None
+        magic, format_version, *cached_stamp, employees, projects, links = CACHE_HEADER.unpack(header)
+        if magic != CACHE_MAGIC or format_version != CACHE_FORMAT_VERSION or tuple(cached_stamp) != tuple(stamp):
+            return None
+        # The mapping stays valid after the file is closed
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    lengths = {
+        'employee_ids': employees, 'employee_departments': employees, 'employee_offsets': employees + 1,
+        'employee_projects': links, 'project_ids': projects, 'project_offsets': projects + 1,
+        'project_employees': links,
+    }
+    view, offset, arrays = memoryview(mapped), CACHE_HEADER.size, {}
+    for name in ProjectGraph.ARRAYS:
+        end = offset + 8 * lengths[name]
+        if end > len(mapped):
+            return None
+        arrays[name] = view[offset:end].cast('q')
+        offset = end
+    return ProjectGraph(**arrays)
+
+
+# The last graph built or loaded in this process, reused (e.g. by the shell) while current
+_memo = None
+
+
+def graph_for(session, cache_path=None):
+    """The current graph: reused from this process or mapped from `cache_path` when
+    it is up to date, otherwise built (and written to `cache_path`)."""
+    global _memo
+    stamp = data_stamp(session)
+    key = (str(session.get_bind().url), stamp)
+    if stamp is not None and _memo is not None and _memo[0] == key:
+        return _memo[1]
+
+    graph = load_graph(cache_path, stamp) if cache_path and stamp is not None else None
+    if graph is None:
+        graph = build_graph(session)
+        if cache_path and stamp is not None:
+            save_graph(graph, cache_path, stamp)
+    _memo = (key, graph)
+    return graph
+
+
+def _as_numpy(values):
+    return numpy.frombuffer(values, dtype=numpy.int64)
+
+
+def co_members(graph, employee_id):
+    """(employee id, shared projects) for everyone sharing a project with `employee_id`,
+    most shared first; None if the employee does not exist."""
+    index = graph.employee_index(employee_id)
+    if index is None:
+        return None
+    projects = graph.projects_of(index)
+    if numpy is not None and len(projects):
+        members = numpy.concatenate([_as_numpy(graph.employees_of(project)) for project in projects])
+        indexes, counts = numpy.unique(members, return_counts=True)
+        counts = zip(indexes.tolist(), counts.tolist())
+    else:
+        counts = Counter(member for project in projects for member in graph.employees_of(project)).items()
+    rows = [(graph.employee_ids[member], count) for member, count in counts if member != index]
+    return sorted(rows, key=lambda row: (-row[1], row[0]))
+
+
+def degrees(graph, min_projects=1):
+    """(employee id, department id, project count) for employees on at least
+    `min_projects` projects, busiest first."""
+    if numpy is not None:
+        counts = numpy.diff(_as_numpy(graph.employee_offsets))
+        selected = numpy.flatnonzero(counts >= min_projects).tolist()
+        counts = counts.tolist()
+    else:
+        offsets = graph.employee_offsets
+        counts = [offsets[i + 1] - offsets[i] for i in range(len(graph.employee_ids))]
+        selected = [i for i, count in enumerate(counts) if count >= min_projects]
+    rows = [(graph.employee_ids[i], graph.employee_departments[i] or None, counts[i]) for i in selected]
+    return sorted(rows, key=lambda row: (-row[2], row[0]))
+
+
+def _numpy_pair_counts(graph, stride):
+    """Pair keys and counts computed without a Python-level loop over projects."""
+    departments = _as_numpy(graph.employee_departments)[_as_numpy(graph.project_employees)]
+    projects = numpy.repeat(numpy.arange(len(graph.project_ids)), numpy.diff(_as_numpy(graph.project_offsets)))
+    staffed = departments > 0
+    # Distinct (project, department) keys, sorted so each project's departments are adjacent and ascending
+    keys = numpy.unique(projects[staffed] * stride + departments[staffed])
+    projects, departments = keys // stride, keys % stride
+
+    # Pair every entry with each later entry of the same project
+    group_ends = numpy.append(numpy.flatnonzero(numpy.diff(projects)) + 1, len(keys))
+    group_sizes = numpy.diff(numpy.concatenate(([0], group_ends)))
+    later = numpy.repeat(group_ends, group_sizes) - numpy.arange(len(keys)) - 1
+    first = numpy.repeat(numpy.arange(len(keys)), later)
+    starts = numpy.cumsum(later) - later
+    second = numpy.arange(len(first)) - numpy.repeat(starts, later) + first + 1
+    return numpy.unique(departments[first] * stride + departments[second], return_counts=True)
+
+
+def department_overlap(graph, limit=None):
+    """(department id, department id, shared projects) for the `limit` pairs of
+    departments (default: all) whose employees share the most projects."""
+    # Pairs are counted as single integers, which hash far faster than tuples
+    stride = max(graph.employee_departments, default=0) + 1
+    if numpy is not None:
+        pairs, counts = _numpy_pair_counts(graph, stride)
+        order = numpy.lexsort((pairs, -counts))[:limit]
+        top = zip(pairs[order].tolist(), counts[order].tolist())
+    else:
+        pair_counts = Counter()
+        departments = graph.employee_departments
+        for project in range(len(graph.project_ids)):
+            staffed = sorted({departments[e] for e in graph.employees_of(project)} - {0})
+            if len(staffed) > 1:
+                pair_counts.update(a * stride + b for a, b in itertools.combinations(staffed, 2))
+
+        def order(item):
+            return -item[1], item[0]
+        top = heapq.nsmallest(limit, pair_counts.items(), key=order) if limit else sorted(pair_counts.items(), key=order)
+    return [(pair // stride, pair % stride, count) for pair, count in top]
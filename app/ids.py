@@ -0,0 +1,50 @@
+# SQLite's default limit on bound parameters per statement is 999 on older builds
+MAX_BOUND_PARAMETERS = 900
+# Lists are expanded into individual IDs, so a typo such as 1-1000000000 must not
+# be allowed to exhaust memory
+MAX_LISTED_IDS = 1_000_000
+
+
+def parse_id_list(text):
+    """Parse a list of positive IDs and ranges such as "1-500, 720" into sorted unique IDs.
+
+    Raises ValueError on any token that is not an ID or a low-high range, and
+    on lists covering more than MAX_LISTED_IDS IDs.
+    """
+    ids = set()
+    listed = 0
+    for token in text.split(','):
+        token = token.strip()
+        if not token:
+            continue
+        low, sep, high = token.partition('-')
+        try:
+            low = int(low.strip())
+            high = int(high.strip()) if sep else low
+        except ValueError:
+            raise ValueError(f"'{token}' is not an ID or an ID range")
+        if low <= 0 or high < low:
+            raise ValueError(f"'{token}' is not a valid ID range")
+        listed += high - low + 1
+        if listed > MAX_LISTED_IDS:
+            raise ValueError(f"'{token}' takes the list past {MAX_LISTED_IDS:,} IDs; split it into smaller lists")
+        ids.update(range(low, high + 1))
+    return sorted(ids)
+
+
+def chunked_ids(ids, size=MAX_BOUND_PARAMETERS):
+    """Split `ids` into lists small enough to bind in a single IN clause."""
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def format_id_ranges(ids):
+    """Format IDs compactly, collapsing consecutive runs: [1, 2, 3, 7] -> "1-3, 7"."""
+    ranges = []
+    for id_ in sorted(ids):
+        if ranges and id_ == ranges[-1][1] + 1:
+            ranges[-1][1] = id_
+        else:
+            ranges.append([id_, id_])
+    return ', '.join(str(low) if low == high else f"{low}-{high}" for low, high in ranges)
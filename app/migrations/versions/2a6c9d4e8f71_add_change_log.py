@@ -0,0 +1,44 @@
+"""add change log
+
+Revision ID: 2a6c9d4e8f71
+Revises: 9b4f2e6a1c53
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.changes import create_change_triggers, drop_change_triggers
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a6c9d4e8f71'
+down_revision: Union[str, None] = '9b4f2e6a1c53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Commands create the table themselves (see create_schema), so it may exist already
+    op.create_table(
+        'change_log',
+        sa.Column('seq', sa.Integer(), primary_key=True),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_key', sa.String(), nullable=False),
+        sa.Column('operation', sa.String(), nullable=False),
+        sa.Column('row', sa.String()),
+        sa.Column('changed_at', sa.String(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sqlite_autoincrement=True,
+        if_not_exists=True,
+    )
+    op.create_index('ix_change_log_entity_key', 'change_log', ['entity', 'entity_key'], if_not_exists=True)
+    # Only changes from now on are logged; existing rows come from a full export
+    create_change_triggers(op.get_bind())
+
+
+def downgrade() -> None:
+    drop_change_triggers(op.get_bind())
+    op.drop_index('ix_change_log_entity_key', table_name='change_log')
+    op.drop_table('change_log')
@@ -0,0 +1,29 @@
+"""add name search index
+
+Revision ID: 3c7e5b2f9a10
+Revises: 8f2c1a9d4b7e
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.search import create_search_index, drop_search_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7e5b2f9a10'
+down_revision: Union[str, None] = '8f2c1a9d4b7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # FTS5 virtual table kept in sync with departments, employees and projects by triggers
+    create_search_index(op.get_bind())
+
+
+def downgrade() -> None:
+    drop_search_index(op.get_bind())
@@ -0,0 +1,48 @@
+"""add summary tables
+
+Revision ID: 5d1e8a3c7b24
+Revises: 3c7e5b2f9a10
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.stats import create_stats_triggers, drop_stats_triggers
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1e8a3c7b24'
+down_revision: Union[str, None] = '3c7e5b2f9a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The tables already exist if a command ran against the database first,
+    # since the app creates any missing tables on startup
+    op.create_table(
+        'department_stats',
+        sa.Column('department_id', sa.Integer(), sa.ForeignKey('departments.id'), primary_key=True),
+        sa.Column('employee_count', sa.Integer(), nullable=False),
+        sa.Column('project_count', sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'employee_project_counts',
+        sa.Column('employee_id', sa.Integer(), sa.ForeignKey('employees.id'), primary_key=True),
+        sa.Column('project_count', sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index('ix_employee_project_counts_project_count', 'employee_project_counts', ['project_count'], if_not_exists=True)
+    # Triggers keep the tables current from here on; they are filled once now
+    create_stats_triggers(op.get_bind())
+
+
+def downgrade() -> None:
+    drop_stats_triggers(op.get_bind())
+    op.drop_index('ix_employee_project_counts_project_count', table_name='employee_project_counts')
+    op.drop_table('employee_project_counts')
+    op.drop_table('department_stats')
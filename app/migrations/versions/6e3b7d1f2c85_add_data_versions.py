@@ -0,0 +1,35 @@
+"""add data versions
+
+Revision ID: 6e3b7d1f2c85
+Revises: 2a6c9d4e8f71
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.versions import create_version_triggers, drop_version_triggers
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e3b7d1f2c85'
+down_revision: Union[str, None] = '2a6c9d4e8f71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'data_versions',
+        sa.Column('name', sa.String(), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    create_version_triggers(op.get_bind())
+
+
+def downgrade() -> None:
+    drop_version_triggers(op.get_bind())
+    op.drop_table('data_versions')
@@ -0,0 +1,34 @@
+"""version employees and assignments
+
+Revision ID: 7f4a2c8e5d19
+Revises: 6e3b7d1f2c85
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.versions import create_version_triggers
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f4a2c8e5d19'
+down_revision: Union[str, None] = '6e3b7d1f2c85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('employees', 'employee_project_association')
+
+
+def upgrade() -> None:
+    # Cached relationship graphs are stamped with these tables' write counters
+    create_version_triggers(op.get_bind())
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        for action in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_version_{action}")
+        op.execute(f"DELETE FROM data_versions WHERE name = '{table}'")
@@ -0,0 +1,60 @@
+"""add indexes and association primary key
+
+Revision ID: 8f2c1a9d4b7e
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2c1a9d4b7e'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# ix_employees_department_id also answers `department_id IS NULL`, so unassigned
+# employees need no partial index of their own
+INDEXES = [
+    ('ix_employees_name', 'employees', ['name']),
+    ('ix_employees_department_id', 'employees', ['department_id']),
+    ('ix_projects_name', 'projects', ['name']),
+    ('ix_projects_department_id', 'projects', ['department_id']),
+    ('ix_employee_project_association_project_id', 'employee_project_association', ['project_id']),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.get_pk_constraint('employee_project_association')['constrained_columns']:
+        # Drop incomplete and duplicate links so the composite primary key can be built
+        op.execute(
+            "DELETE FROM employee_project_association "
+            "WHERE employee_id IS NULL OR project_id IS NULL"
+        )
+        op.execute(
+            "DELETE FROM employee_project_association WHERE rowid NOT IN ("
+            "SELECT MIN(rowid) FROM employee_project_association GROUP BY employee_id, project_id)"
+        )
+        with op.batch_alter_table('employee_project_association', recreate='always') as batch_op:
+            batch_op.alter_column('employee_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.alter_column('project_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.create_primary_key('pk_employee_project_association', ['employee_id', 'project_id'])
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
+
+    with op.batch_alter_table('employee_project_association', recreate='always') as batch_op:
+        batch_op.drop_constraint('pk_employee_project_association', type_='primary')
+        batch_op.alter_column('employee_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column('project_id', existing_type=sa.Integer(), nullable=True)
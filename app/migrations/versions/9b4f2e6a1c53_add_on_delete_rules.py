@@ -0,0 +1,90 @@
+"""add on delete rules
+
+Revision ID: 9b4f2e6a1c53
+Revises: 5d1e8a3c7b24
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.search import create_search_index
+from app.stats import create_stats_triggers
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4f2e6a1c53'
+down_revision: Union[str, None] = '5d1e8a3c7b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _tables(on_delete):
+    """The tables holding foreign keys, with or without their ON DELETE rules."""
+    def foreign_key(target, rule):
+        return sa.ForeignKey(target, ondelete=rule if on_delete else None)
+
+    metadata = sa.MetaData()
+    return [
+        sa.Table(
+            'departments', metadata,
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(), nullable=False, unique=True),
+            sa.Column('head_of_department_id', sa.Integer(), foreign_key('employees.id', 'SET NULL')),
+        ),
+        sa.Table(
+            'employees', metadata,
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String()),
+            sa.Column('department_id', sa.Integer(), foreign_key('departments.id', 'SET NULL')),
+            sa.Index('ix_employees_name', 'name'),
+            sa.Index('ix_employees_department_id', 'department_id'),
+        ),
+        sa.Table(
+            'projects', metadata,
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String()),
+            sa.Column('department_id', sa.Integer(), foreign_key('departments.id', 'SET NULL')),
+            sa.Index('ix_projects_name', 'name'),
+            sa.Index('ix_projects_department_id', 'department_id'),
+        ),
+        sa.Table(
+            'employee_project_association', metadata,
+            sa.Column('employee_id', sa.Integer(), foreign_key('employees.id', 'CASCADE'), primary_key=True),
+            sa.Column('project_id', sa.Integer(), foreign_key('projects.id', 'CASCADE'), primary_key=True),
+            sa.Index('ix_employee_project_association_project_id', 'project_id'),
+        ),
+        sa.Table(
+            'department_stats', metadata,
+            sa.Column('department_id', sa.Integer(), foreign_key('departments.id', 'CASCADE'), primary_key=True),
+            sa.Column('employee_count', sa.Integer(), nullable=False),
+            sa.Column('project_count', sa.Integer(), nullable=False),
+        ),
+        sa.Table(
+            'employee_project_counts', metadata,
+            sa.Column('employee_id', sa.Integer(), foreign_key('employees.id', 'CASCADE'), primary_key=True),
+            sa.Column('project_count', sa.Integer(), nullable=False),
+            sa.Index('ix_employee_project_counts_project_count', 'project_count'),
+        ),
+    ]
+
+
+def _rebuild(on_delete):
+    # SQLite cannot change a foreign key in place, so each table is copied into a
+    # new definition. Dropping the old tables also drops their triggers, which
+    # are recreated afterwards (the summary tables are refilled at the same time).
+    for table in _tables(on_delete):
+        with op.batch_alter_table(table.name, recreate='always', copy_from=table):
+            pass
+    create_search_index(op.get_bind())
+    create_stats_triggers(op.get_bind())
+
+
+def upgrade() -> None:
+    _rebuild(on_delete=True)
+
+
+def downgrade() -> None:
+    _rebuild(on_delete=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, Table, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -8,30 +8,76 @@ Base = declarative_base()
 employee_project_association = Table(
     'employee_project_association',
     Base.metadata,
-    Column('employee_id', Integer, ForeignKey('employees.id')),
-    Column('project_id', Integer, ForeignKey('projects.id'))
+    Column('employee_id', Integer, ForeignKey('employees.id', ondelete='CASCADE'), primary_key=True),
+    Column('project_id', Integer, ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True),
+    # The primary key serves lookups by employee; this one serves lookups by project
+    Index('ix_employee_project_association_project_id', 'project_id'),
+)
+
+# Summary tables maintained by triggers (see app/stats.py) so reports can read
+# headcounts and project loads without scanning the tables they summarise
+department_stats = Table(
+    'department_stats',
+    Base.metadata,
+    Column('department_id', Integer, ForeignKey('departments.id', ondelete='CASCADE'), primary_key=True),
+    Column('employee_count', Integer, nullable=False, default=0),
+    Column('project_count', Integer, nullable=False, default=0),
+)
+
+employee_project_counts = Table(
+    'employee_project_counts',
+    Base.metadata,
+    Column('employee_id', Integer, ForeignKey('employees.id', ondelete='CASCADE'), primary_key=True),
+    Column('project_count', Integer, nullable=False, default=0, index=True),
+)
+
+# Append-only log of row changes, written by triggers (see app/changes.py) so
+# mirrors can sync incrementally. AUTOINCREMENT guarantees a sequence number is
+# never handed out twice, even after compaction deletes entries.
+change_log = Table(
+    'change_log',
+    Base.metadata,
+    Column('seq', Integer, primary_key=True),
+    Column('entity', String, nullable=False),
+    Column('entity_key', String, nullable=False),
+    Column('operation', String, nullable=False),
+    Column('row', String),  # JSON object of the row's new values; the key columns for deletes
+    Column('changed_at', String, nullable=False, server_default=text('CURRENT_TIMESTAMP')),
+    Index('ix_change_log_entity_key', 'entity', 'entity_key'),
+    sqlite_autoincrement=True,
+)
+
+# One counter per table, bumped by triggers (see app/versions.py) on every write
+# so caches can tell whether their copy is still current
+data_versions = Table(
+    'data_versions',
+    Base.metadata,
+    Column('name', String, primary_key=True),
+    Column('version', Integer, nullable=False, default=0),
 )
 
 class Department(Base):
     __tablename__ = 'departments'
     id = Column(Integer, primary_key=True)
     name = Column(String, unique=True, nullable=False)  # Added unique constraint
-    head_of_department_id = Column(Integer, ForeignKey('employees.id'))
+    head_of_department_id = Column(Integer, ForeignKey('employees.id', ondelete='SET NULL'))
     head_of_department = relationship('Employee', foreign_keys=[head_of_department_id], uselist=False)
-    employees = relationship('Employee', backref='department', foreign_keys='Employee.department_id')
-    projects = relationship('Project', back_populates='department')
+    # passive_deletes leaves clearing references to the database's ON DELETE rules
+    # instead of loading every member to null it out
+    employees = relationship('Employee', backref='department', foreign_keys='Employee.department_id', passive_deletes=True)
+    projects = relationship('Project', back_populates='department', passive_deletes=True)
 
 class Employee(Base):
     __tablename__ = 'employees'
     id = Column(Integer, primary_key=True)
-    name = Column(String)
-    department_id = Column(Integer, ForeignKey('departments.id'))
-    projects = relationship('Project', secondary=employee_project_association, back_populates='employees')
+    name = Column(String, index=True)
+    department_id = Column(Integer, ForeignKey('departments.id', ondelete='SET NULL'), index=True)
+    projects = relationship('Project', secondary=employee_project_association, back_populates='employees', passive_deletes=True)
 
 class Project(Base):
     __tablename__ = 'projects'
     id = Column(Integer, primary_key=True)
-    name = Column(String)
-    department_id = Column(Integer, ForeignKey('departments.id'))
+    name = Column(String, index=True)
+    department_id = Column(Integer, ForeignKey('departments.id', ondelete='SET NULL'), index=True)
     department = relationship('Department', back_populates='projects')
-    employees = relationship('Employee', secondary=employee_project_association, back_populates='projects')
+    employees = relationship('Employee', secondary=employee_project_association, back_populates='projects', passive_deletes=True)
@@ -0,0 +1,79 @@
+import csv
+import json
+import sys
+
+import click
+
+from app import profiling
+
+TABLE_FORMATS = ('grid', 'plain')
+STREAMING_FORMATS = ('csv', 'tsv', 'jsonl')
+OUTPUT_FORMATS = TABLE_FORMATS + STREAMING_FORMATS
+DEFAULT_FORMAT = 'grid'
+
+
+def _json_key(header):
+    return header.lower().replace(' ', '_')
+
+
+def write_pages(pages, headers, output_format, stream):
+    """Write pages of rows to `stream` in `output_format`; returns the row count.
+
+    grid and plain render one tabulate table per page. csv, tsv and jsonl are
+    written row by row as the rows are fetched, without measuring any cells.
+    """
+    count = 0
+    if output_format in TABLE_FORMATS:
+        from tabulate import tabulate  # deferred so startup does not pay for it
+
+        for rows in pages:
+            if not rows:
+                continue
+            stream.write(tabulate(rows, headers=headers, tablefmt=output_format, numalign="center"))
+            stream.write('\n')
+            count += len(rows)
+    elif output_format in ('csv', 'tsv'):
+        delimiter = ',' if output_format == 'csv' else '\t'
+        writer = csv.writer(stream, delimiter=delimiter, lineterminator='\n')
+        writer.writerow(headers)
+        for rows in pages:
+            writer.writerows(rows)
+            count += len(rows)
+    elif output_format == 'jsonl':
+        keys = [_json_key(header) for header in headers]
+        for rows in pages:
+            for row in rows:
+                stream.write(json.dumps(dict(zip(keys, row))))
+                stream.write('\n')
+            count += len(rows)
+    else:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    stream.flush()
+    return count
+
+
+def echo_error(message):
+    click.secho(message, fg='red')
+
+
+def echo_success(message):
+    click.secho(message, fg='green')
+
+
+def output_format():
+    ctx = click.get_current_context(silent=True)
+    if ctx is None or ctx.find_root().obj is None:
+        return DEFAULT_FORMAT
+    return ctx.find_root().obj.get('format', DEFAULT_FORMAT)
+
+
+def echo_pages(pages, headers):
+    # Print each page as soon as it is fetched; returns False if a table format had no rows
+    fmt = output_format()
+    with profiling.phase('render'):
+        count = write_pages(profiling.timed_pages(pages), headers, fmt, sys.stdout)
+    return count > 0 or fmt in STREAMING_FORMATS
+
+
+def echo_table(rows, headers):
+    return echo_pages([rows], headers)
@@ -0,0 +1,168 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import click
+
+SLOWEST_STATEMENTS = 5
+
+# The profiler for the running command, if --profile was given
+current = None
+
+
+def _percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, round(fraction * len(values)) - 1))
+    return values[index]
+
+
+class Profiler:
+    """Collects SQL statements and splits wall time into exclusive phases.
+
+    Time is always charged to the innermost active phase, so nested phases
+    (a SQL statement run while fetching a page that is being rendered) are
+    not counted twice. Anything outside a named phase is charged to "other"
+    (imports, ORM work, prompts).
+    """
+
+    def __init__(self):
+        self.statements = []  # (duration in seconds, statement, parameters)
+        self.phase_times = defaultdict(float)
+        self.rows_fetched = 0
+        self.objects_loaded = 0
+        self._stack = ['other']
+        self._started = self._mark = time.perf_counter()
+
+    def _charge(self):
+        now = time.perf_counter()
+        self.phase_times[self._stack[-1]] += now - self._mark
+        self._mark = now
+
+    def enter(self, name):
+        self._charge()
+        self._stack.append(name)
+
+    def exit(self):
+        self._charge()
+        if len(self._stack) > 1:
+            self._stack.pop()
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('profile_started', []).append(time.perf_counter())
+        self.enter('sql')
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.exit()
+        started = conn.info['profile_started'].pop()
+        self.statements.append((time.perf_counter() - started, statement, parameters))
+
+    def handle_error(self, exception_context):
+        # after_cursor_execute is skipped for failed statements
+        started = exception_context.connection.info.get('profile_started') if exception_context.connection else None
+        if started:
+            self.exit()
+            started.pop()
+
+    def object_loaded(self, target, context):
+        self.objects_loaded += 1
+
+    def summary(self):
+        self._charge()
+        durations = sorted(duration for duration, _, _ in self.statements)
+        slowest = sorted(self.statements, key=lambda statement: statement[0], reverse=True)[:SLOWEST_STATEMENTS]
+        return {
+            'wall_ms': (time.perf_counter() - self._started) * 1000,
+            'phases_ms': {name: seconds * 1000 for name, seconds in sorted(self.phase_times.items())},
+            'statement_count': len(durations),
+            'statement_total_ms': sum(durations) * 1000,
+            'statement_p50_ms': _percentile(durations, 0.50) * 1000,
+            'statement_p95_ms': _percentile(durations, 0.95) * 1000,
+            'rows_fetched': self.rows_fetched,
+            'objects_loaded': self.objects_loaded,
+            'slowest_statements': [
+                {'ms': duration * 1000, 'statement': ' '.join(statement.split()), 'parameters': repr(parameters)}
+                for duration, statement, parameters in slowest
+            ],
+        }
+
+
+def start():
+    """Begin profiling the current command."""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app.models import Base
+
+    global current
+    current = Profiler()
+    event.listen(Engine, 'before_cursor_execute', current.before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', current.after_cursor_execute)
+    event.listen(Engine, 'handle_error', current.handle_error)
+    event.listen(Base, 'load', current.object_loaded, propagate=True)
+    return current
+
+
+def finish(json_path=None):
+    """Stop profiling, print the summary to stderr and optionally save it as JSON."""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app.models import Base
+
+    global current
+    profiler, current = current, None
+    if profiler is None:
+        return
+    event.remove(Engine, 'before_cursor_execute', profiler.before_cursor_execute)
+    event.remove(Engine, 'after_cursor_execute', profiler.after_cursor_execute)
+    event.remove(Engine, 'handle_error', profiler.handle_error)
+    event.remove(Base, 'load', profiler.object_loaded)
+
+    summary = profiler.summary()
+    phases = ', '.join(f"{name} {ms:.1f} ms" for name, ms in summary['phases_ms'].items())
+    click.echo(
+        f"Profile: {summary['statement_count']} statements, {summary['statement_total_ms']:.1f} ms in SQL "
+        f"(p50 {summary['statement_p50_ms']:.2f} ms, p95 {summary['statement_p95_ms']:.2f} ms), "
+        f"{summary['rows_fetched']} rows fetched for output, {summary['objects_loaded']} ORM objects loaded",
+        err=True,
+    )
+    click.echo(f"Wall time {summary['wall_ms']:.1f} ms: {phases}", err=True)
+    if summary['slowest_statements']:
+        click.echo("Slowest statements:", err=True)
+        for statement in summary['slowest_statements']:
+            click.echo(f"  {statement['ms']:8.2f} ms  {statement['statement']}  {statement['parameters']}", err=True)
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+@contextmanager
+def phase(name):
+    """Charge the time spent in the block to `name` when profiling."""
+    profiler = current
+    if profiler is None:
+        yield
+        return
+    profiler.enter(name)
+    try:
+        yield
+    finally:
+        profiler.exit()
+
+
+def timed_pages(pages):
+    """Pass pages through, charging the wait for each page to "fetch" and counting rows."""
+    if current is None:
+        yield from pages
+        return
+    iterator = iter(pages)
+    while True:
+        with phase('fetch'):
+            page = next(iterator, None)
+        if page is None:
+            return
+        if current is not None:
+            current.rows_fetched += len(page)
+        yield page
@@ -0,0 +1,123 @@
+from sqlalchemy import func, select
+
+from app.constants import DEFAULT_PAGE_SIZE
+from app.models import Department, Employee, Project, employee_project_association
+
+
+def keyset_pages(session, statement, key_column, page_size=DEFAULT_PAGE_SIZE, after_id=None, limit=None):
+    """Yield the rows of `statement` one page at a time, ordered by `key_column`.
+
+    Each page is its own `key_column > last seen` query, so memory use and the
+    time to the first page do not depend on table size. `key_column` must be
+    the first selected column.
+    """
+    remaining = limit
+    last_key = after_id
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        page_statement = statement.order_by(key_column).limit(size)
+        if last_key is not None:
+            page_statement = page_statement.where(key_column > last_key)
+
+        rows = session.execute(page_statement).all()
+        if not rows:
+            return
+        yield rows
+
+        if len(rows) < size:
+            return
+        if remaining is not None:
+            remaining -= len(rows)
+        last_key = rows[-1][0]
+
+
+def entity_pages(session, entity, **paging):
+    """Pages of (id, name) rows for a Department, Employee or Project table."""
+    return keyset_pages(session, select(entity.id, entity.name), entity.id, **paging)
+
+
+def projects_by_department_pages(session, **paging):
+    """Pages of (project id, department name, project name) rows."""
+    statement = (
+        select(Project.id, Department.name, Project.name)
+        .join(Department, Project.department_id == Department.id)
+    )
+    return keyset_pages(session, statement, Project.id, **paging)
+
+
+def streamed_pages(session, statement, page_size=DEFAULT_PAGE_SIZE, limit=None):
+    """Yield the rows of `statement` in pages read from a single streaming cursor."""
+    if limit is not None:
+        statement = statement.limit(limit)
+    result = session.execute(statement.execution_options(yield_per=page_size))
+    yield from result.partitions()
+
+
+def assignment_pages(session, **paging):
+    """Pages of (employee id, project id) rows from the association table."""
+    association = employee_project_association
+    statement = (
+        select(association.c.employee_id, association.c.project_id)
+        .order_by(association.c.employee_id, association.c.project_id)
+    )
+    return streamed_pages(session, statement, **paging)
+
+
+# Report queries. Each one returns plain rows from a fixed number of statements
+# (usually one), however many departments, employees or projects are involved.
+
+def heads_of_departments(session):
+    """(head of department name, department name) for departments that have a head."""
+    statement = (
+        select(Employee.name, Department.name)
+        .select_from(Department)
+        .outerjoin(Employee, Department.head_of_department_id == Employee.id)
+        .where(Department.head_of_department_id.isnot(None))
+        .order_by(Department.id)
+    )
+    return session.execute(statement).all()
+
+
+def employees_in_department(session, department_name):
+    """Return (department exists, [(employee id, employee name), ...])."""
+    statement = (
+        select(Department.id, Employee.id, Employee.name)
+        .select_from(Department)
+        .outerjoin(Employee, Employee.department_id == Department.id)
+        .where(Department.name == department_name)
+        .order_by(Employee.id)
+    )
+    rows = session.execute(statement).all()
+    return bool(rows), [(employee_id, name) for _, employee_id, name in rows if employee_id is not None]
+
+
+def employee_info(session, employee_id):
+    """Return None for an unknown employee, else (department name, [(project id, project name), ...])."""
+    association = employee_project_association
+    statement = (
+        select(Department.name, Project.id, Project.name)
+        .select_from(Employee)
+        .outerjoin(Department, Employee.department_id == Department.id)
+        .outerjoin(association, association.c.employee_id == Employee.id)
+        .outerjoin(Project, Project.id == association.c.project_id)
+        .where(Employee.id == employee_id)
+        .order_by(Project.id)
+    )
+    rows = session.execute(statement).all()
+    if not rows:
+        return None
+    return rows[0][0], [(project_id, name) for _, project_id, name in rows if project_id is not None]
+
+
+def available_employees_with_projects(session):
+    """(id, name, comma-separated project names) for employees without a department."""
+    association = employee_project_association
+    statement = (
+        select(Employee.id, Employee.name, func.coalesce(func.group_concat(Project.name, ', '), ''))
+        .outerjoin(association, association.c.employee_id == Employee.id)
+        .outerjoin(Project, Project.id == association.c.project_id)
+        .where(Employee.department_id.is_(None))
+        .group_by(Employee.id)
+        .order_by(Employee.id)
+    )
+    return session.execute(statement).all()
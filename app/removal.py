@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+
+from sqlalchemy import delete, select, update
+
+from app.constants import EMPLOYEE_REMOVAL_POLICIES, PROJECT_REMOVAL_POLICIES
+from app.ids import chunked_ids
+from app.models import Department, Employee, Project, employee_project_association
+
+
+@dataclass
+class RemovalResult:
+    removed: int = 0
+    employees_moved: int = 0  # detached or reassigned
+    projects_moved: int = 0  # detached or reassigned
+    projects_deleted: int = 0
+    links_deleted: int = 0
+
+
+def matching_ids(session, entity, name=None, pattern=None, ids=None):
+    """Sorted IDs of the `entity` rows selected by exact name, shell-style wildcard
+    pattern (e.g. "Temp*") and/or an ID list; the selections are combined."""
+    found = set()
+    if name is not None:
+        found.update(session.scalars(select(entity.id).where(entity.name == name)))
+    if pattern is not None:
+        # GLOB is case-sensitive, so a literal prefix can use the name index
+        found.update(session.scalars(select(entity.id).where(entity.name.op('GLOB')(pattern))))
+    if ids:
+        for chunk in chunked_ids(ids):
+            found.update(session.scalars(select(entity.id).where(entity.id.in_(chunk))))
+    return sorted(found)
+
+
+def _delete_links(session, column, chunk):
+    association = employee_project_association
+    return session.execute(delete(association).where(column.in_(chunk))).rowcount
+
+
+def remove_projects(session, project_ids):
+    """Delete the projects and their employee links, a chunk of IDs per statement."""
+    result = RemovalResult()
+    for chunk in chunked_ids(project_ids):
+        result.links_deleted += _delete_links(session, employee_project_association.c.project_id, chunk)
+        result.removed += session.execute(delete(Project).where(Project.id.in_(chunk))).rowcount
+    return result
+
+
+def remove_employees(session, employee_ids):
+    """Delete the employees, their project links and any head-of-department references."""
+    result = RemovalResult()
+    for chunk in chunked_ids(employee_ids):
+        session.execute(
+            update(Department).where(Department.head_of_department_id.in_(chunk)).values(head_of_department_id=None)
+        )
+        result.links_deleted += _delete_links(session, employee_project_association.c.employee_id, chunk)
+        result.removed += session.execute(delete(Employee).where(Employee.id.in_(chunk))).rowcount
+    return result
+
+
+def remove_departments(session, department_ids, employees='detach', projects='detach', reassign_to=None):
+    """Delete the departments, first applying the policies for their members.
+
+    `employees` is 'detach' (leave them without a department) or 'reassign'
+    (move them to `reassign_to`); `projects` is 'detach', 'reassign' or
+    'delete' (remove them with their employee links). Every step is one
+    statement per chunk of department IDs, so the cost does not depend on
+    loading the departments' members. The caller commits.
+    """
+    if employees not in EMPLOYEE_REMOVAL_POLICIES:
+        raise ValueError(f"Unknown employee policy: {employees}")
+    if projects not in PROJECT_REMOVAL_POLICIES:
+        raise ValueError(f"Unknown project policy: {projects}")
+    if 'reassign' in (employees, projects):
+        if reassign_to is None:
+            raise ValueError("A department to reassign to is required.")
+        if reassign_to in department_ids:
+            raise ValueError(f"Cannot reassign to department {reassign_to}, which is being removed.")
+        if session.get(Department, reassign_to) is None:
+            raise ValueError(f"Department with ID {reassign_to} not found.")
+    target = reassign_to if 'reassign' in (employees, projects) else None
+
+    result = RemovalResult()
+    for chunk in chunked_ids(department_ids):
+        result.employees_moved += session.execute(
+            update(Employee)
+            .where(Employee.department_id.in_(chunk))
+            .values(department_id=target if employees == 'reassign' else None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        if projects == 'delete':
+            doomed = select(Project.id).where(Project.department_id.in_(chunk))
+            result.links_deleted += _delete_links(session, employee_project_association.c.project_id, doomed)
+            result.projects_deleted += session.execute(
+                delete(Project).where(Project.department_id.in_(chunk)).execution_options(synchronize_session=False)
+            ).rowcount
+        else:
+            result.projects_moved += session.execute(
+                update(Project)
+                .where(Project.department_id.in_(chunk))
+                .values(department_id=target if projects == 'reassign' else None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+        result.removed += session.execute(
+            delete(Department).where(Department.id.in_(chunk)).execution_options(synchronize_session=False)
+        ).rowcount
+    return result
@@ -0,0 +1,152 @@
+import difflib
+import warnings
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Rows of the search index are keyed by `id * 4 + kind`, so triggers can find an
+# entity's entry by rowid instead of scanning the index
+KINDS = {1: 'department', 2: 'employee', 3: 'project'}
+KIND_CODES = {kind: code for code, kind in KINDS.items()}
+TABLES = {'department': 'departments', 'employee': 'employees', 'project': 'projects'}
+
+# Fuzzy matches are re-ranked in Python from this many candidates per result
+FUZZY_CANDIDATES = 10
+# Queries up to this length also match through their one-typo variants
+FUZZY_VARIANT_LENGTH = 12
+
+
+def _trigger_ddl(kind):
+    table, code = TABLES[kind], KIND_CODES[kind]
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table}
+        WHEN new.name IS NOT NULL BEGIN
+            INSERT INTO search_index(rowid, name) VALUES (new.id * 4 + {code}, new.name);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE OF id, name ON {table} BEGIN
+            DELETE FROM search_index WHERE rowid = old.id * 4 + {code};
+            INSERT INTO search_index(rowid, name) SELECT new.id * 4 + {code}, new.name WHERE new.name IS NOT NULL;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN
+            DELETE FROM search_index WHERE rowid = old.id * 4 + {code};
+        END""",
+    ]
+
+
+def create_search_index(connection):
+    """Create the FTS5 name index and its sync triggers, filling it on first creation.
+
+    Needs SQLite 3.34+ for the trigram tokenizer; on older builds the index is
+    skipped with a warning and the `search` command reports it as unavailable.
+    """
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+    ).first()
+    if not exists:
+        try:
+            connection.exec_driver_sql("CREATE VIRTUAL TABLE search_index USING fts5(name, tokenize='trigram')")
+        except OperationalError as e:
+            warnings.warn(f"Name search is unavailable: {e.orig}")
+            return
+        for kind, table in TABLES.items():
+            connection.exec_driver_sql(
+                f"INSERT INTO search_index(rowid, name) "
+                f"SELECT id * 4 + {KIND_CODES[kind]}, name FROM {table} WHERE name IS NOT NULL"
+            )
+    for kind in TABLES:
+        for ddl in _trigger_ddl(kind):
+            connection.exec_driver_sql(ddl)
+
+
+def drop_search_index(connection):
+    for table in TABLES.values():
+        for action in ('insert', 'update', 'delete'):
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {table}_search_{action}")
+    connection.exec_driver_sql("DROP TABLE IF EXISTS search_index")
+
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _kind_filter(kinds):
+    if not kinds:
+        return ""
+    return f" AND rowid % 4 IN ({', '.join(str(KIND_CODES[kind]) for kind in kinds)})"
+
+
+def _rows(result):
+    return [(KINDS[rowid % 4], rowid // 4, name) for rowid, name in result]
+
+
+def _trigrams(term):
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+def _typo_variants(term):
+    """`term` plus, for short terms, every single-deletion and adjacent-transposition variant."""
+    variants = {term}
+    if len(term) <= FUZZY_VARIANT_LENGTH:
+        variants.update(term[:i] + term[i + 1:] for i in range(len(term)))
+        variants.update(term[:i] + term[i + 1] + term[i] + term[i + 2:] for i in range(len(term) - 1))
+    return variants
+
+
+def search_names(session, query, kinds=None, fuzzy=False, limit=20):
+    """Return up to `limit` (kind, id, name) matches for `query`, best first.
+
+    The default mode matches names containing `query` (case-insensitively),
+    ranking names that start with it first. Fuzzy mode matches names sharing
+    any three-letter sequence with `query` or one of its single deletion or
+    transposition variants, and ranks them by similarity, so small typos still
+    find the intended name. Queries shorter than three characters are
+    case-sensitive name prefixes.
+    """
+    query = query.strip()
+    if not query:
+        return []
+
+    if len(query) < 3:
+        # Too short for trigrams: range scans on the indexed name columns
+        rows = []
+        for kind in kinds or TABLES:
+            rows.extend(
+                (kind, entity_id, name) for entity_id, name in session.execute(
+                    text(f"SELECT id, name FROM {TABLES[kind]} WHERE name >= :low AND name < :high "
+                         f"ORDER BY name LIMIT :limit"),
+                    {'low': query, 'high': query + '\U0010ffff', 'limit': limit},
+                )
+            )
+        return sorted(rows, key=lambda row: (len(row[2]), row[2]))[:limit]
+
+    if not fuzzy:
+        result = session.execute(
+            text(f"SELECT rowid, name FROM search_index WHERE search_index MATCH :match{_kind_filter(kinds)} "
+                 f"ORDER BY name LIKE :prefix DESC, rank, length(name) LIMIT :limit"),
+            {'match': _quote(query), 'prefix': query.replace('%', '').replace('_', '') + '%', 'limit': limit},
+        )
+        return _rows(result)
+
+    lowered = query.lower()
+    trigrams = sorted({trigram for variant in _typo_variants(lowered) for trigram in _trigrams(variant)})
+    result = session.execute(
+        text(f"SELECT rowid, name FROM search_index WHERE search_index MATCH :match{_kind_filter(kinds)} "
+             f"ORDER BY rank LIMIT :limit"),
+        {'match': ' OR '.join(_quote(trigram) for trigram in trigrams), 'limit': limit * FUZZY_CANDIDATES},
+    )
+    candidates = _rows(result)
+    candidates.sort(key=lambda row: difflib.SequenceMatcher(None, lowered, row[2].lower()).ratio(), reverse=True)
+    return candidates[:limit]
+
+
+def search_available(session):
+    return session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")
+    ).first() is not None
+
+
+def suggest_names(session, kind, name, limit=10):
+    """(id, name) of the entities whose names most resemble `name`, for "did you mean" hints."""
+    if not search_available(session):
+        return []
+    return [(entity_id, match) for _, entity_id, match in search_names(session, name, [kind], fuzzy=True, limit=limit)]
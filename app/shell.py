@@ -0,0 +1,135 @@
+import bisect
+import shlex
+
+import click
+from sqlalchemy import select
+
+from app.database import session
+from app.models import Department, Employee, Project
+
+try:
+    import readline
+except ImportError:  # e.g. Windows without pyreadline
+    readline = None
+
+PROMPT = 'ems> '
+EXIT_COMMANDS = ('exit', 'quit')
+# Commands whose name starts with one of these can change the names offered for completion
+MUTATING_PREFIXES = ('add', 'remove', 'bulk', 'assign', 'run')
+
+
+class NameIndex:
+    """Sorted in-memory lists of department, employee and project names for prefix lookups."""
+
+    def __init__(self):
+        self._names = None
+
+    def invalidate(self):
+        self._names = None
+
+    def _load(self):
+        self._names = {
+            entity: sorted(set(session.scalars(select(entity.name).where(entity.name.isnot(None)))))
+            for entity in (Department, Employee, Project)
+        }
+        session.rollback()  # do not hold a read transaction open between commands
+
+    def complete(self, entity, prefix):
+        if self._names is None:
+            self._load()
+        names = self._names[entity]
+        start = bisect.bisect_left(names, prefix)
+        end = bisect.bisect_left(names, prefix + '￿')
+        return names[start:end]
+
+
+def _entity_for(command_name):
+    for word, entity in (('department', Department), ('employee', Employee), ('project', Project)):
+        if word in command_name:
+            return entity
+    return None
+
+
+class Completer:
+    def __init__(self, cli, names):
+        self.cli = cli
+        self.names = names
+        self._matches = []
+
+    def candidates(self, line, text):
+        try:
+            tokens = shlex.split(line)
+        except ValueError:  # unterminated quote
+            tokens = line.split()
+        if text and tokens:
+            tokens = tokens[:-1]
+
+        # Skip global options such as --format csv to find the command name
+        command_name = next((token for token in tokens if token in self.cli.commands), None)
+        if command_name is None:
+            return [name + ' ' for name in self.cli.list_commands(None) if name.startswith(text)]
+
+        command = self.cli.commands[command_name]
+        previous = tokens[-1] if tokens else ''
+        if previous.endswith('name'):
+            entity = _entity_for(previous) or _entity_for(command_name)
+            if entity is not None:
+                prefix = text.lstrip('"\'')
+                return [shlex.quote(name) + ' ' for name in self.names.complete(entity, prefix)]
+        options = [option for param in command.params for option in getattr(param, 'opts', []) if option.startswith('--')]
+        return [option + ' ' for option in options if option.startswith(text)]
+
+    def __call__(self, text, state):
+        if state == 0:
+            self._matches = self.candidates(readline.get_line_buffer()[:readline.get_endidx()], text)
+        return self._matches[state] if state < len(self._matches) else None
+
+
+def run_shell(cli):
+    """Read and run CLI commands until EOF or `exit`, reusing one engine and session.
+
+    Each line is parsed by the same click group as the command line, so every
+    command and global option (--format, --profile) works unchanged.
+    """
+    names = NameIndex()
+    if readline is not None:
+        readline.set_completer(Completer(cli, names))
+        readline.set_completer_delims(' \t\n')
+        readline.parse_and_bind('tab: complete')
+
+    click.echo("Employee Management shell. Type a command, 'help' for the list, 'exit' to leave.")
+    while True:
+        try:
+            line = input(PROMPT)
+        except EOFError:
+            click.echo()
+            break
+        except KeyboardInterrupt:
+            click.echo()
+            continue
+
+        try:
+            args = shlex.split(line)
+        except ValueError as e:
+            click.secho(f"Could not parse command: {e}", fg='red')
+            continue
+        if not args:
+            continue
+        if args[0] in EXIT_COMMANDS:
+            break
+        if args[0] == 'help':
+            args = ['--help']
+
+        try:
+            # obj marks the invocation as coming from the shell, which keeps the session open
+            cli.main(args=args, prog_name='', standalone_mode=False, obj={'shell': True})
+        except click.ClickException as e:
+            e.show()
+        except click.Abort:
+            click.echo()
+        finally:
+            # End any read transaction so other processes' writes become visible
+            session.rollback()
+
+        if any(name.startswith(MUTATING_PREFIXES) for name in args if name in cli.commands):
+            names.invalidate()
@@ -0,0 +1,220 @@
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from sqlalchemy import create_engine
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.database import SCHEMA_VERSION, create_database_engine, create_schema
+from app.models import Base
+
+MANIFEST = 'manifest.json'
+SNAPSHOT_FORMAT_VERSION = 1
+# Exported tables and the column partitions are split on; the summary tables,
+# search index and version counters are rebuilt from these on restore
+PARTITION_KEYS = {
+    'departments': 'id',
+    'employees': 'id',
+    'projects': 'id',
+    'employee_project_association': 'employee_id',
+}
+COMPRESS_LEVEL = 6
+INSERT_BATCH = 10_000
+
+
+def _columns(table):
+    return [column.name for column in Base.metadata.tables[table].columns]
+
+
+def _primary_key(table):
+    return [column.name for column in Base.metadata.tables[table].primary_key]
+
+
+def _read_only(path):
+    # The workers use sqlite3 directly: each is its own process with its own
+    # connection, and rows go from the cursor to the file without row processing
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def _boundaries(connection, table, key, partition_size):
+    """First key of every `partition_size` rows, in key order; duplicates (a key
+    spanning a boundary, e.g. an employee's links) stay in one partition."""
+    rows = connection.execute(
+        f"SELECT {key} FROM (SELECT {key}, row_number() OVER (ORDER BY {key}) AS n FROM {table}) "
+        f"WHERE n % ? = 1", (partition_size,)
+    )
+    return sorted({key_value for key_value, in rows})
+
+
+def _export_partition(task):
+    path, directory, table, key, low, high, number = task
+    columns = _columns(table)
+    file_name = f"{table}-{number:05d}.jsonl.gz"
+    where, parameters = f"{key} >= ?", [low]
+    if high is not None:
+        where += f" AND {key} < ?"
+        parameters.append(high)
+
+    connection = _read_only(path)
+    digest, rows = hashlib.sha256(), 0
+    try:
+        cursor = connection.execute(
+            f"SELECT {', '.join(columns)} FROM {table} WHERE {where} ORDER BY {', '.join(_primary_key(table))}",
+            parameters,
+        )
+        with gzip.open(os.path.join(directory, file_name), 'wb', compresslevel=COMPRESS_LEVEL) as f:
+            while True:
+                batch = cursor.fetchmany(INSERT_BATCH)
+                if not batch:
+                    break
+                data = ''.join(json.dumps(row, separators=(',', ':')) + '\n' for row in batch).encode()
+                digest.update(data)
+                f.write(data)
+                rows += len(batch)
+    finally:
+        connection.close()
+    return table, {'file': file_name, 'first_key': low, 'end_key': high, 'rows': rows, 'sha256': digest.hexdigest()}
+
+
+def _latest_change(connection):
+    return connection.execute("SELECT coalesce(max(seq), 0) FROM change_log").fetchone()[0]
+
+
+def export_snapshot(path, directory, partition_size, workers=None):
+    """Write every table of the database at `path` to gzipped JSON-lines shards of
+    at most about `partition_size` rows, plus a manifest; returns the manifest.
+
+    Partitions are exported in parallel, each by a worker process with its own
+    read-only connection. The change log's latest sequence number is read
+    before and after: if it moved, the shards may come from different points
+    in time and the export fails rather than produce an inconsistent snapshot.
+    """
+    os.makedirs(directory, exist_ok=True)
+    if os.listdir(directory):
+        raise ValueError(f"Export directory {directory} is not empty.")
+
+    connection = _read_only(path)
+    try:
+        change_seq = _latest_change(connection)
+        tasks = []
+        for table, key in PARTITION_KEYS.items():
+            boundaries = _boundaries(connection, table, key, partition_size)
+            for number, low in enumerate(boundaries):
+                high = boundaries[number + 1] if number + 1 < len(boundaries) else None
+                tasks.append((path, directory, table, key, low, high, number))
+    finally:
+        connection.close()
+
+    shards = {table: [] for table in PARTITION_KEYS}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for table, shard in pool.map(_export_partition, tasks):
+            shards[table].append(shard)
+
+    connection = _read_only(path)
+    try:
+        if _latest_change(connection) != change_seq:
+            raise RuntimeError("The database changed during the export; run it again.")
+    finally:
+        connection.close()
+
+    manifest = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'schema_version': SCHEMA_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'change_seq': change_seq,
+        'tables': {
+            table: {'columns': _columns(table), 'rows': sum(shard['rows'] for shard in shards[table]), 'shards': shards[table]}
+            for table in PARTITION_KEYS
+        },
+    }
+    # Written last, so a directory with a manifest always holds a complete export
+    with open(os.path.join(directory, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _read_shard(task):
+    directory, shard = task
+    with gzip.open(os.path.join(directory, shard['file']), 'rb') as f:
+        data = f.read()
+    if hashlib.sha256(data).hexdigest() != shard['sha256']:
+        raise ValueError(f"Shard {shard['file']} is corrupt (checksum mismatch).")
+    return [tuple(json.loads(line)) for line in data.splitlines()]
+
+
+def restore_snapshot(directory, path, workers=None):
+    """Load an export into a new database at `path`; returns the row counts per table.
+
+    Worker processes decompress, verify and parse the shards while the single
+    writer inserts them, with at most a few shards per worker in memory. The
+    tables are loaded without indexes or triggers; those are built afterwards,
+    which also fills the search index and summary tables.
+    """
+    workers = workers or os.cpu_count()
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest['format_version'] != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {manifest['format_version']}.")
+    if manifest['schema_version'] > SCHEMA_VERSION:
+        raise ValueError(f"The snapshot has schema version {manifest['schema_version']}, newer than this "
+                         f"version's {SCHEMA_VERSION}; restore it with a newer release.")
+    if os.path.exists(path):
+        raise ValueError(f"{path} already exists; restore needs a new database file.")
+
+    connection = sqlite3.connect(path, isolation_level=None)
+    try:
+        for pragma in ('journal_mode=OFF', 'synchronous=OFF', 'foreign_keys=OFF'):
+            connection.execute(f"PRAGMA {pragma}")
+        dialect = create_engine('sqlite://').dialect
+        for table in Base.metadata.tables.values():
+            connection.execute(str(CreateTable(table).compile(dialect=dialect)))
+
+        counts = {}
+        connection.execute("BEGIN")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            limit = 2 * workers
+            for table, details in manifest['tables'].items():
+                columns = details['columns']
+                statement = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+                pending, shards = set(), details['shards']
+                counts[table] = 0
+                # Keep a bounded number of parsed shards in flight
+                for shard in shards:
+                    pending.add(pool.submit(_read_shard, (directory, shard)))
+                    if len(pending) < limit:
+                        continue
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        rows = future.result()
+                        connection.executemany(statement, rows)
+                        counts[table] += len(rows)
+                for future in pending:
+                    rows = future.result()
+                    connection.executemany(statement, rows)
+                    counts[table] += len(rows)
+                if counts[table] != details['rows']:
+                    raise ValueError(f"Restored {counts[table]} {table} rows, the manifest lists {details['rows']}.")
+        connection.execute("COMMIT")
+
+        # Indexes are built once over the loaded rows instead of maintained per insert
+        for table in Base.metadata.tables.values():
+            for index in table.indexes:
+                connection.execute(str(CreateIndex(index).compile(dialect=dialect)))
+        # Sequence numbers continue from the exported database's change log
+        connection.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('change_log', ?)", (manifest['change_seq'],))
+        connection.execute("PRAGMA journal_mode=DELETE")
+    except BaseException:
+        connection.close()
+        os.remove(path)
+        raise
+    connection.close()
+
+    # Triggers, search index, summary tables and version counters
+    engine = create_database_engine(f"sqlite:///{path}")
+    create_schema(engine)
+    engine.dispose()
+    return counts
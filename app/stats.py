@@ -0,0 +1,172 @@
+from sqlalchemy import func, select
+
+from app.models import Department, Employee, Project, department_stats, employee_project_counts, employee_project_association
+
+# Triggers keeping department_stats and employee_project_counts in step with the
+# tables they summarise. Every trigger touches a single summary row by primary key.
+STATS_TRIGGERS = {
+    'departments_stats_insert': """
+        CREATE TRIGGER IF NOT EXISTS departments_stats_insert AFTER INSERT ON departments BEGIN
+            INSERT OR IGNORE INTO department_stats (department_id, employee_count, project_count)
+            VALUES (new.id, 0, 0);
+        END""",
+    'departments_stats_delete': """
+        CREATE TRIGGER IF NOT EXISTS departments_stats_delete AFTER DELETE ON departments BEGIN
+            DELETE FROM department_stats WHERE department_id = old.id;
+        END""",
+    'employees_stats_insert': """
+        CREATE TRIGGER IF NOT EXISTS employees_stats_insert AFTER INSERT ON employees
+        WHEN new.department_id IS NOT NULL BEGIN
+            INSERT INTO department_stats (department_id, employee_count, project_count) VALUES (new.department_id, 1, 0)
+            ON CONFLICT (department_id) DO UPDATE SET employee_count = employee_count + 1;
+        END""",
+    'employees_stats_delete': """
+        CREATE TRIGGER IF NOT EXISTS employees_stats_delete AFTER DELETE ON employees
+        WHEN old.department_id IS NOT NULL BEGIN
+            UPDATE department_stats SET employee_count = employee_count - 1 WHERE department_id = old.department_id;
+        END""",
+    'employees_stats_update': """
+        CREATE TRIGGER IF NOT EXISTS employees_stats_update AFTER UPDATE OF department_id ON employees
+        WHEN old.department_id IS NOT new.department_id BEGIN
+            UPDATE department_stats SET employee_count = employee_count - 1 WHERE department_id = old.department_id;
+            INSERT INTO department_stats (department_id, employee_count, project_count)
+            SELECT new.department_id, 1, 0 WHERE new.department_id IS NOT NULL
+            ON CONFLICT (department_id) DO UPDATE SET employee_count = employee_count + 1;
+        END""",
+    'projects_stats_insert': """
+        CREATE TRIGGER IF NOT EXISTS projects_stats_insert AFTER INSERT ON projects
+        WHEN new.department_id IS NOT NULL BEGIN
+            INSERT INTO department_stats (department_id, employee_count, project_count) VALUES (new.department_id, 0, 1)
+            ON CONFLICT (department_id) DO UPDATE SET project_count = project_count + 1;
+        END""",
+    'projects_stats_delete': """
+        CREATE TRIGGER IF NOT EXISTS projects_stats_delete AFTER DELETE ON projects
+        WHEN old.department_id IS NOT NULL BEGIN
+            UPDATE department_stats SET project_count = project_count - 1 WHERE department_id = old.department_id;
+        END""",
+    'projects_stats_update': """
+        CREATE TRIGGER IF NOT EXISTS projects_stats_update AFTER UPDATE OF department_id ON projects
+        WHEN old.department_id IS NOT new.department_id BEGIN
+            UPDATE department_stats SET project_count = project_count - 1 WHERE department_id = old.department_id;
+            INSERT INTO department_stats (department_id, employee_count, project_count)
+            SELECT new.department_id, 0, 1 WHERE new.department_id IS NOT NULL
+            ON CONFLICT (department_id) DO UPDATE SET project_count = project_count + 1;
+        END""",
+    'assignments_stats_insert': """
+        CREATE TRIGGER IF NOT EXISTS assignments_stats_insert AFTER INSERT ON employee_project_association BEGIN
+            INSERT INTO employee_project_counts (employee_id, project_count) VALUES (new.employee_id, 1)
+            ON CONFLICT (employee_id) DO UPDATE SET project_count = project_count + 1;
+        END""",
+    'assignments_stats_delete': """
+        CREATE TRIGGER IF NOT EXISTS assignments_stats_delete AFTER DELETE ON employee_project_association BEGIN
+            UPDATE employee_project_counts SET project_count = project_count - 1 WHERE employee_id = old.employee_id;
+            DELETE FROM employee_project_counts WHERE employee_id = old.employee_id AND project_count <= 0;
+        END""",
+    'assignments_stats_update': """
+        CREATE TRIGGER IF NOT EXISTS assignments_stats_update AFTER UPDATE OF employee_id ON employee_project_association
+        WHEN old.employee_id IS NOT new.employee_id BEGIN
+            UPDATE employee_project_counts SET project_count = project_count - 1 WHERE employee_id = old.employee_id;
+            DELETE FROM employee_project_counts WHERE employee_id = old.employee_id AND project_count <= 0;
+            INSERT INTO employee_project_counts (employee_id, project_count) VALUES (new.employee_id, 1)
+            ON CONFLICT (employee_id) DO UPDATE SET project_count = project_count + 1;
+        END""",
+}
+
+
+def create_stats_triggers(connection):
+    """Create the summary triggers, filling the summary tables if they are new."""
+    existing = set(connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'").scalars())
+    for ddl in STATS_TRIGGERS.values():
+        connection.exec_driver_sql(ddl)
+    if not existing.issuperset(STATS_TRIGGERS):
+        rebuild_stats(connection)
+
+
+def drop_stats_triggers(connection):
+    for name in STATS_TRIGGERS:
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def _computed_department_stats():
+    employees = (
+        select(Employee.department_id, func.count().label('count'))
+        .where(Employee.department_id.isnot(None))
+        .group_by(Employee.department_id)
+        .subquery()
+    )
+    projects = (
+        select(Project.department_id, func.count().label('count'))
+        .where(Project.department_id.isnot(None))
+        .group_by(Project.department_id)
+        .subquery()
+    )
+    return (
+        select(
+            Department.id,
+            func.coalesce(employees.c.count, 0),
+            func.coalesce(projects.c.count, 0),
+        )
+        .outerjoin(employees, employees.c.department_id == Department.id)
+        .outerjoin(projects, projects.c.department_id == Department.id)
+    )
+
+
+def _computed_employee_project_counts():
+    association = employee_project_association
+    return select(association.c.employee_id, func.count()).group_by(association.c.employee_id)
+
+
+def rebuild_stats(connection):
+    """Recompute both summary tables from scratch; the caller owns the transaction."""
+    connection.execute(department_stats.delete())
+    connection.execute(department_stats.insert().from_select(
+        ['department_id', 'employee_count', 'project_count'], _computed_department_stats()
+    ))
+    connection.execute(employee_project_counts.delete())
+    connection.execute(employee_project_counts.insert().from_select(
+        ['employee_id', 'project_count'], _computed_employee_project_counts()
+    ))
+
+
+def check_stats(connection):
+    """Compare the summary tables with freshly computed aggregates.
+
+    Returns a list of (table, key, stored, computed) mismatches.
+    """
+    mismatches = []
+    def counts(rows):
+        return {key: f"{employees} employees, {projects} projects" for key, employees, projects in rows}
+
+    stored = counts(connection.execute(select(department_stats)))
+    computed = counts(connection.execute(_computed_department_stats()))
+    for key in sorted(stored.keys() | computed.keys()):
+        if stored.get(key) != computed.get(key):
+            mismatches.append(('department_stats', key, stored.get(key), computed.get(key)))
+
+    stored = dict(connection.execute(select(employee_project_counts)).all())
+    computed = dict(connection.execute(_computed_employee_project_counts()).all())
+    for key in sorted(stored.keys() | computed.keys()):
+        if stored.get(key) != computed.get(key):
+            mismatches.append(('employee_project_counts', key, stored.get(key), computed.get(key)))
+    return mismatches
+
+
+def department_summary(session):
+    """(department, employees, projects) per department, read from department_stats."""
+    statement = (
+        select(Department.name, department_stats.c.employee_count, department_stats.c.project_count)
+        .join(department_stats, department_stats.c.department_id == Department.id)
+        .order_by(Department.id)
+    )
+    return session.execute(statement).all()
+
+
+def busiest_employees(session, limit):
+    """(employee id, name, project count) for the employees on the most projects."""
+    statement = (
+        select(Employee.id, Employee.name, employee_project_counts.c.project_count)
+        .join(employee_project_counts, employee_project_counts.c.employee_id == Employee.id)
+        .order_by(employee_project_counts.c.project_count.desc(), Employee.id)
+        .limit(limit)
+    )
+    return session.execute(statement).all()
@@ -0,0 +1,57 @@
+import os
+import random
+import time
+
+from sqlalchemy.exc import OperationalError
+
+# How long a write keeps retrying while other processes hold the database, in seconds
+WRITE_DEADLINE = float(os.environ.get('EMS_WRITE_DEADLINE', 30))
+# Retry delays are drawn uniformly from [0, min(cap, base * 2 ** retries)]
+BACKOFF_BASE = 0.005
+BACKOFF_CAP = 0.5
+
+# SQLite result codes for a database held by another connection
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+
+def is_busy(error):
+    code = getattr(error.orig, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff in (SQLITE_BUSY, SQLITE_LOCKED)
+    message = str(error.orig)
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def write_transaction(session, work, deadline=None):
+    """Run `work()` in one BEGIN IMMEDIATE transaction on `session` and commit it.
+
+    The write lock is taken when the transaction starts, so a transaction
+    never fails halfway because another writer got in first. While the
+    database is busy the whole transaction is retried with jittered
+    exponential backoff until `deadline` seconds have passed. `work` may run
+    more than once and should only issue the writes; prompts and lookups
+    belong before the call. Any transaction already open on the session is
+    rolled back first. Returns (result of `work`, number of retries).
+    """
+    deadline = WRITE_DEADLINE if deadline is None else deadline
+    give_up = time.monotonic() + deadline
+    retries = 0
+    session.rollback()
+    while True:
+        try:
+            session.connection(execution_options={'sqlite_begin': 'IMMEDIATE'})
+            result = work()
+            session.commit()
+            return result, retries
+        except OperationalError as e:
+            session.rollback()
+            if not is_busy(e):
+                raise
+            delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** retries))
+            if time.monotonic() + delay > give_up:
+                raise RuntimeError(
+                    f"the database stayed busy for {deadline:g}s ({retries} retries); nothing was written"
+                ) from e
+            time.sleep(delay)
+            retries += 1
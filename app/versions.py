@@ -0,0 +1,33 @@
+from sqlalchemy import select
+
+from app.models import data_versions
+
+# Tables whose writes bump their counter in data_versions
+VERSIONED_TABLES = ('departments', 'employees', 'employee_project_association')
+
+
+def _trigger_ddl(table):
+    return {
+        f"{table}_version_{action}": f"""CREATE TRIGGER IF NOT EXISTS {table}_version_{action} AFTER {action.upper()} ON {table} BEGIN
+            UPDATE data_versions SET version = version + 1 WHERE name = '{table}';
+        END"""
+        for action in ('insert', 'update', 'delete')
+    }
+
+
+def create_version_triggers(connection):
+    for table in VERSIONED_TABLES:
+        connection.exec_driver_sql(f"INSERT OR IGNORE INTO data_versions (name, version) VALUES ('{table}', 0)")
+        for ddl in _trigger_ddl(table).values():
+            connection.exec_driver_sql(ddl)
+
+
+def drop_version_triggers(connection):
+    for table in VERSIONED_TABLES:
+        for name in _trigger_ddl(table):
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def data_version(session, table):
+    """The write counter of `table`; it changes whenever the table does."""
+    return session.scalar(select(data_versions.c.version).where(data_versions.c.name == table))
@@ -0,0 +1,122 @@
+"""Generate a synthetic organisation in an SQLite database.
+
+    python -m benchmarks.generator /tmp/org.db --employees 100000 --skew 1.0
+"""
+import itertools
+import random
+import string
+from dataclasses import dataclass
+
+import click
+from sqlalchemy import insert
+
+from app.database import create_database_engine, create_schema
+from app.models import Department, Employee, Project, employee_project_association
+
+INSERT_BATCH = 20_000
+
+
+@dataclass
+class OrganizationSpec:
+    employees: int
+    departments: int = None
+    projects: int = None
+    links_per_employee: float = 2.0  # association density
+    unassigned_fraction: float = 0.05  # employees without a department
+    skew: float = 0.0  # 0 gives equal departments, larger values a Zipf-like spread
+    seed: int = 0
+
+    def __post_init__(self):
+        if self.departments is None:
+            self.departments = max(5, self.employees // 100)
+        if self.projects is None:
+            self.projects = max(self.departments, self.employees // 20)
+
+
+def department_name(index):
+    # Letters only, so the names pass the CLI's name validation
+    letters = []
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters.append(string.ascii_uppercase[remainder])
+    return 'Department' + ''.join(reversed(letters))
+
+
+def _batched(rows):
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, INSERT_BATCH))
+        if not batch:
+            return
+        yield batch
+
+
+def _insert(connection, table, rows):
+    for batch in _batched(rows):
+        connection.execute(insert(table), batch)
+
+
+def generate_organization(path, spec):
+    """Create the schema at `path` and fill it according to `spec`. Rows are streamed
+    in batches, so memory stays flat even for millions of employees."""
+    rng = random.Random(spec.seed)
+    department_ids = range(1, spec.departments + 1)
+    # Cumulative weights let random.choices draw departments in O(log n)
+    weights = list(itertools.accumulate(1 / rank ** spec.skew for rank in department_ids))
+
+    def pick_departments(count):
+        return rng.choices(department_ids, cum_weights=weights, k=count)
+
+    engine = create_database_engine(f"sqlite:///{path}")
+    create_schema(engine)
+    with engine.begin() as connection:
+        _insert(connection, Department.__table__, (
+            {'id': i, 'name': department_name(i - 1)} for i in department_ids
+        ))
+        _insert(connection, Project.__table__, (
+            {'id': i, 'name': f"Project {i}", 'department_id': department_id}
+            for i, department_id in enumerate(pick_departments(spec.projects), start=1)
+        ))
+        _insert(connection, Employee.__table__, (
+            {
+                'id': i,
+                'name': f"Employee {i}",
+                'department_id': None if rng.random() < spec.unassigned_fraction else pick_departments(1)[0],
+            }
+            for i in range(1, spec.employees + 1)
+        ))
+
+        def links():
+            whole, fraction = divmod(spec.links_per_employee, 1)
+            for employee_id in range(1, spec.employees + 1):
+                count = int(whole) + (rng.random() < fraction)
+                for project_id in set(rng.randint(1, spec.projects) for _ in range(count)):
+                    yield {'employee_id': employee_id, 'project_id': project_id}
+
+        _insert(connection, employee_project_association, links())
+
+        # Every department gets its first employee as head
+        connection.exec_driver_sql(
+            "UPDATE departments SET head_of_department_id = "
+            "(SELECT MIN(id) FROM employees WHERE employees.department_id = departments.id)"
+        )
+    engine.dispose()
+
+
+@click.command()
+@click.argument('path', type=click.Path(dir_okay=False))
+@click.option('--employees', type=click.IntRange(1), default=1000, show_default=True)
+@click.option('--departments', type=click.IntRange(1), help='Defaults to one per 100 employees.')
+@click.option('--projects', type=click.IntRange(1), help='Defaults to one per 20 employees.')
+@click.option('--links-per-employee', type=click.FloatRange(0), default=2.0, show_default=True)
+@click.option('--skew', type=click.FloatRange(0), default=0.0, show_default=True,
+              help='Zipf exponent for department sizes; 0 means equal sizes.')
+@click.option('--seed', type=int, default=0, show_default=True)
+def main(path, **options):
+    generate_organization(path, OrganizationSpec(**options))
+    click.echo(f"Generated {options['employees']} employees in {path}")
+
+
+if __name__ == '__main__':
+    main()
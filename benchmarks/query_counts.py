@@ -0,0 +1,98 @@
+"""Check that report commands issue a constant number of SQL statements.
+
+Runs each command against a small and a larger synthetic organisation, counts
+the statements it emits and fails if any count grows with the data size.
+
+    python -m benchmarks.query_counts
+"""
+import os
+import sys
+import tempfile
+
+import click
+from click.testing import CliRunner
+from sqlalchemy import event, insert, update
+
+from app.database import create_database_engine, create_schema, set_engine
+from app.models import Department, Employee, Project, employee_project_association
+from main import cli
+
+# Paginated commands legitimately issue one query per page; a page size larger
+# than any test table keeps the check about per-row lazy loads
+ONE_PAGE = ['--page-size', '1000000']
+
+# (arguments, prompt input) for each command under test
+COMMANDS = {
+    'display-heads-of-departments': (['display-heads-of-departments'], None),
+    'display-projects-by-departments': (['display-projects-by-departments'] + ONE_PAGE, None),
+    'display-employees-in-department': (['display-employees-in-department', '--department_name', 'DepartmentA'], None),
+    'view-my-info': (['view-my-info'], '1\n'),
+    'display-departments': (['display-departments'] + ONE_PAGE, None),
+    'display-employees': (['display-employees'] + ONE_PAGE, None),
+}
+
+
+def populate(engine, departments, employees_per_department, projects_per_department):
+    employees = departments * employees_per_department
+    projects = departments * projects_per_department
+    with engine.begin() as connection:
+        # Letter-only names so they pass the CLI's name validation
+        names = [f"Department{chr(65 + i % 26)}{i // 26 or ''}" for i in range(departments)]
+        connection.execute(insert(Department), [{'id': i + 1, 'name': name} for i, name in enumerate(names)])
+        connection.execute(insert(Employee), [
+            {'id': i + 1, 'name': f"Employee {i + 1}", 'department_id': i // employees_per_department + 1}
+            for i in range(employees)
+        ])
+        # Heads are set once their employees exist, as foreign keys are enforced
+        connection.execute(update(Department).values(
+            head_of_department_id=(Department.id - 1) * employees_per_department + 1
+        ))
+        connection.execute(insert(Project), [
+            {'id': i + 1, 'name': f"Project {i + 1}", 'department_id': i // projects_per_department + 1}
+            for i in range(projects)
+        ])
+        connection.execute(insert(employee_project_association), [
+            {'employee_id': e + 1, 'project_id': (e // employees_per_department) * projects_per_department + p + 1}
+            for e in range(employees) for p in range(projects_per_department)
+        ])
+
+
+def count_statements(path, scale):
+    engine = create_database_engine(f"sqlite:///{path}")
+    create_schema(engine)
+    populate(engine, departments=5 * scale, employees_per_department=10 * scale, projects_per_department=3)
+    set_engine(engine)
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    counts = {}
+    runner = CliRunner()
+    for name, (args, prompt_input) in COMMANDS.items():
+        statements.clear()
+        result = runner.invoke(cli, ['--format', 'csv'] + args, input=prompt_input)
+        if result.exit_code != 0:
+            raise RuntimeError(f"{name} failed: {result.output}")
+        counts[name] = len(statements)
+    engine.dispose()
+    return counts
+
+
+@click.command()
+@click.option('--scale', type=click.IntRange(2), default=10, show_default=True,
+              help='How much larger the second organisation is than the first.')
+def main(scale):
+    with tempfile.TemporaryDirectory() as directory:
+        small = count_statements(os.path.join(directory, 'small.db'), 1)
+        large = count_statements(os.path.join(directory, 'large.db'), scale)
+
+    failed = False
+    for name in COMMANDS:
+        grew = large[name] > small[name]
+        failed = failed or grew
+        click.secho(f"{name}: {small[name]} -> {large[name]} statements", fg='red' if grew else None)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Compare query plans and timings before and after the index migration.
+
+Builds a synthetic database with the original (index-free) schema, measures
+the lookups the CLI performs, runs `alembic upgrade head` against it and
+measures them again.
+
+    python -m benchmarks.query_plans --employees 100000
+"""
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import click
+from alembic import command
+from alembic.config import Config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Schema as shipped before the index migration
+ORIGINAL_SCHEMA = """
+CREATE TABLE departments (
+    id INTEGER NOT NULL, name VARCHAR, head_of_department_id INTEGER,
+    PRIMARY KEY (id), FOREIGN KEY(head_of_department_id) REFERENCES employees (id)
+);
+CREATE TABLE employees (
+    id INTEGER NOT NULL, name VARCHAR, department_id INTEGER,
+    PRIMARY KEY (id), FOREIGN KEY(department_id) REFERENCES departments (id)
+);
+CREATE TABLE projects (
+    id INTEGER NOT NULL, name VARCHAR, department_id INTEGER,
+    PRIMARY KEY (id), FOREIGN KEY(department_id) REFERENCES departments (id)
+);
+CREATE TABLE employee_project_association (
+    employee_id INTEGER, project_id INTEGER,
+    FOREIGN KEY(employee_id) REFERENCES employees (id),
+    FOREIGN KEY(project_id) REFERENCES projects (id)
+);
+"""
+
+# The lookups behind get_available_employees, display_employees_in_department,
+# remove_entity by name and the employee.projects / project.employees lazy loads
+QUERIES = {
+    'unassigned employees': ("SELECT id, name FROM employees WHERE department_id IS NULL", ()),
+    'employees in department': ("SELECT id, name FROM employees WHERE department_id = ?", (7,)),
+    'employee by name': ("SELECT id FROM employees WHERE name = ?", ('Employee 4242',)),
+    'project by name': ("SELECT id FROM projects WHERE name = ?", ('Project 42',)),
+    'projects of employee': (
+        "SELECT projects.id, projects.name FROM projects "
+        "JOIN employee_project_association AS a ON a.project_id = projects.id "
+        "WHERE a.employee_id = ?", (4242,)),
+    'employees of project': (
+        "SELECT employees.id, employees.name FROM employees "
+        "JOIN employee_project_association AS a ON a.employee_id = employees.id "
+        "WHERE a.project_id = ?", (42,)),
+}
+
+
+def populate(path, employees, departments, projects, links_per_employee):
+    rng = random.Random(0)
+    with sqlite3.connect(path) as connection:
+        connection.executescript(ORIGINAL_SCHEMA)
+        connection.executemany(
+            "INSERT INTO departments (id, name) VALUES (?, ?)",
+            ((i, f"Department {i}") for i in range(1, departments + 1)))
+        connection.executemany(
+            "INSERT INTO projects (id, name, department_id) VALUES (?, ?, ?)",
+            ((i, f"Project {i}", rng.randint(1, departments)) for i in range(1, projects + 1)))
+        # Roughly 5% of employees have no department yet
+        connection.executemany(
+            "INSERT INTO employees (id, name, department_id) VALUES (?, ?, ?)",
+            ((i, f"Employee {i}", None if rng.random() < 0.05 else rng.randint(1, departments))
+             for i in range(1, employees + 1)))
+        connection.executemany(
+            "INSERT INTO employee_project_association (employee_id, project_id) VALUES (?, ?)",
+            ((i, rng.randint(1, projects)) for i in range(1, employees + 1) for _ in range(links_per_employee)))
+
+
+def measure(path, repeat):
+    results = {}
+    with sqlite3.connect(path) as connection:
+        for label, (sql, params) in QUERIES.items():
+            plan = [row[-1] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                connection.execute(sql, params).fetchall()
+                timings.append(time.perf_counter() - started)
+            results[label] = (plan, statistics.median(timings) * 1000)
+    return results
+
+
+def upgrade(path):
+    config = Config(os.path.join(ROOT, 'alembic.ini'))
+    config.set_main_option('script_location', os.path.join(ROOT, 'app', 'migrations'))
+    config.set_main_option('sqlalchemy.url', f"sqlite:///{path}")
+    command.upgrade(config, 'head')
+
+
+@click.command()
+@click.option('--employees', type=click.IntRange(1), default=100_000, show_default=True)
+@click.option('--departments', type=click.IntRange(1), default=50, show_default=True)
+@click.option('--projects', type=click.IntRange(1), default=2_000, show_default=True)
+@click.option('--links-per-employee', type=click.IntRange(0), default=3, show_default=True)
+@click.option('--repeat', type=click.IntRange(1), default=20, show_default=True)
+def main(employees, departments, projects, links_per_employee, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'benchmark.db')
+        populate(path, employees, departments, projects, links_per_employee)
+        before = measure(path, repeat)
+        upgrade(path)
+        after = measure(path, repeat)
+
+    for label in QUERIES:
+        (plan_before, ms_before), (plan_after, ms_after) = before[label], after[label]
+        click.echo(f"{label}: {ms_before:.3f} ms -> {ms_after:.3f} ms")
+        click.echo(f"  before: {'; '.join(plan_before)}")
+        click.echo(f"  after:  {'; '.join(plan_after)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Guard CLI startup time.
+
+Times `python main.py --help` against a bare interpreter and fails if the
+difference exceeds the budget, or if `--help` loads SQLAlchemy or tabulate.
+
+    python -m benchmarks.startup --budget-ms 100
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('sqlalchemy', 'tabulate', 'app.models', 'app.database')
+
+
+def median_runtime(args, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(args, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+@click.command()
+@click.option('--repeat', type=click.IntRange(1), default=15, show_default=True)
+@click.option('--budget-ms', type=float, default=100.0, show_default=True,
+              help='Allowed startup time on top of a bare `python -c pass`.')
+def main(repeat, budget_ms):
+    baseline = median_runtime([sys.executable, '-c', 'pass'], repeat)
+    help_time = median_runtime([sys.executable, 'main.py', '--help'], repeat)
+    overhead = help_time - baseline
+    click.echo(f"python -c pass:      {baseline:.1f} ms")
+    click.echo(f"main.py --help:      {help_time:.1f} ms")
+    click.echo(f"startup overhead:    {overhead:.1f} ms (budget {budget_ms:.0f} ms)")
+
+    check = "import main, sys; print(' '.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,)
+    loaded = subprocess.run([sys.executable, '-c', check], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout.split()
+
+    failed = False
+    if loaded:
+        click.secho(f"Importing main.py loaded: {', '.join(loaded)}", fg='red')
+        failed = True
+    if overhead > budget_ms:
+        click.secho("Startup overhead is over budget", fg='red')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
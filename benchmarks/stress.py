@@ -0,0 +1,171 @@
+"""Hammer one database with concurrent writers and check nothing was lost.
+
+Each worker process runs a random mix of add/assign/move/remove commands
+through the CLI for a fixed time. Afterwards the database must pass SQLite's
+integrity and foreign key checks, the summary tables must match the data,
+and the number of projects must equal the initial count plus the projects
+added minus those removed.
+
+    python -m benchmarks.stress --workers 8 --seconds 20
+"""
+import os
+import random
+import re
+import statistics
+import string
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import click
+from click.testing import CliRunner
+
+from benchmarks.generator import OrganizationSpec, department_name, generate_organization
+
+RETRIES = re.compile(r"after (\d+) retries")
+
+
+def _name(rng):
+    return ''.join(rng.choice(string.ascii_letters) for _ in range(10))
+
+
+def _add_project(spec, rng):
+    return ['add-project', '--name', _name(rng)], f"{department_name(rng.randrange(spec.departments))}\n"
+
+
+def _assign_projects(spec, rng):
+    department_id = rng.randint(1, spec.departments)
+    projects = ','.join(str(rng.randint(1, spec.projects)) for _ in range(3))
+    return ['assign-projects-to-employees', '--department-id', str(department_id), '--projects', projects,
+            '--mode', 'additive'], None
+
+
+def _move_employees(spec, rng):
+    start = rng.randint(1, spec.employees - 10)
+    return ['add-employees-to-a-department', '--department-id', str(rng.randint(1, spec.departments)),
+            '--ids', f"{start}-{start + 9}"], None
+
+
+def _remove_project(spec, rng):
+    return ['remove-project', '--ids', str(rng.randint(1, spec.projects * 2)), '--yes'], None
+
+
+OPERATIONS = {
+    'add-project': _add_project,
+    'assign-projects': _assign_projects,
+    'move-employees': _move_employees,
+    'remove-project': _remove_project,
+}
+
+
+def run_worker(path, spec, seconds, seed, busy_timeout):
+    """Run random operations against `path` for `seconds`; returns per-operation results."""
+    # Set before the engine is created, so the pragma override applies to it
+    os.environ['EMS_SQLITE_BUSY_TIMEOUT'] = str(busy_timeout)
+    from app.database import create_database_engine, set_engine
+    from main import cli
+
+    set_engine(create_database_engine(f"sqlite:///{path}"))
+    rng = random.Random(seed)
+    runner = CliRunner()
+    results = defaultdict(lambda: {'latencies': [], 'retries': 0, 'errors': [], 'added': 0, 'removed': 0})
+    names = list(OPERATIONS)
+    stop = time.monotonic() + seconds
+    while time.monotonic() < stop:
+        name = rng.choice(names)
+        args, prompt_input = OPERATIONS[name](spec, rng)
+        started = time.perf_counter()
+        result = runner.invoke(cli, args, input=prompt_input)
+        elapsed = time.perf_counter() - started
+
+        record = results[name]
+        record['latencies'].append(elapsed)
+        record['retries'] += sum(int(count) for count in RETRIES.findall(result.stderr))
+        if result.exit_code != 0 or 'Error' in result.output:
+            record['errors'].append(result.output.strip().splitlines()[-1] if result.output.strip() else repr(result.exception))
+        elif name == 'add-project' and 'Added project' in result.output:
+            record['added'] += 1
+        elif name == 'remove-project' and 'Removed project' in result.output:
+            record['removed'] += 1
+    return dict(results)
+
+
+def check_integrity(path, expected_projects):
+    """Return a list of problems found in the database at `path`."""
+    from app.database import create_database_engine
+    from app.stats import check_stats
+
+    problems = []
+    engine = create_database_engine(f"sqlite:///{path}")
+    with engine.connect() as connection:
+        integrity = connection.exec_driver_sql("PRAGMA integrity_check").scalar()
+        if integrity != 'ok':
+            problems.append(f"integrity_check: {integrity}")
+        violations = connection.exec_driver_sql("PRAGMA foreign_key_check").all()
+        if violations:
+            problems.append(f"{len(violations)} foreign key violations, e.g. {violations[0]}")
+        mismatches = check_stats(connection)
+        if mismatches:
+            problems.append(f"{len(mismatches)} summary table mismatches, e.g. {mismatches[0]}")
+        projects = connection.exec_driver_sql("SELECT count(*) FROM projects").scalar()
+        if projects != expected_projects:
+            problems.append(f"{projects} projects, expected {expected_projects}")
+    engine.dispose()
+    return problems
+
+
+@click.command()
+@click.option('--workers', type=click.IntRange(1), default=8, show_default=True)
+@click.option('--seconds', type=click.FloatRange(0.1), default=10.0, show_default=True)
+@click.option('--employees', type=click.IntRange(100), default=2000, show_default=True)
+@click.option('--busy-timeout', type=click.IntRange(0), default=0, show_default=True,
+              help="SQLite's own wait for locks, in ms; 0 leaves all waiting to the retry loop.")
+@click.option('--seed', type=int, default=0, show_default=True)
+def main(workers, seconds, employees, busy_timeout, seed):
+    spec = OrganizationSpec(employees=employees, seed=seed)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'stress.db')
+        generate_organization(path, spec)
+
+        click.echo(f"{workers} workers for {seconds:g}s against {employees} employees...")
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+            futures = [pool.submit(run_worker, path, spec, seconds, seed + i, busy_timeout) for i in range(workers)]
+            outcomes = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+
+        merged = defaultdict(lambda: {'latencies': [], 'retries': 0, 'errors': [], 'added': 0, 'removed': 0})
+        for outcome in outcomes:
+            for name, record in outcome.items():
+                for key, value in record.items():
+                    merged[name][key] += value
+
+        total = errors = 0
+        for name, record in sorted(merged.items()):
+            latencies = sorted(record['latencies'])
+            total += len(latencies)
+            errors += len(record['errors'])
+            click.echo(
+                f"  {name}: {len(latencies)} ops, p50 {statistics.median(latencies) * 1000:.1f} ms, "
+                f"p95 {latencies[max(0, round(0.95 * len(latencies)) - 1)] * 1000:.1f} ms, "
+                f"{record['retries']} retries, {len(record['errors'])} errors"
+            )
+            for message in record['errors'][:3]:
+                click.secho(f"    {message}", fg='red')
+        # Startup of the worker processes is included, so this is a lower bound
+        click.echo(f"{total} operations in {elapsed:.1f}s ({total / elapsed:.0f} ops/s)")
+
+        expected = spec.projects + merged['add-project']['added'] - merged['remove-project']['removed']
+        problems = check_integrity(path, expected)
+        for problem in problems:
+            click.secho(problem, fg='red')
+        if not problems:
+            click.secho("Integrity checks passed.", fg='green')
+    sys.exit(1 if errors or problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""Time the CLI's main code paths against synthetic organisations.
+
+Each iteration is a real `python main.py ...` process, as run from cron or a
+script, so the latency includes startup. Peak RSS is read from the process's
+own resource usage.
+
+    python -m benchmarks.suite run --scale 1000 --scale 100000 -o baseline.json
+    python -m benchmarks.suite compare baseline.json current.json
+"""
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+
+from app.ids import format_id_ranges
+from benchmarks.generator import OrganizationSpec, department_name, generate_organization
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The CLI reports failures on stdout and still exits with 0
+FAILURE_MARKERS = ('Error', 'not found')
+
+
+class Scenario:
+    """A CLI invocation to time. `prepare(spec, rng, database_path)` returns
+    (arguments, prompt input, rows handled)."""
+
+    def __init__(self, name, prepare, mutates=False):
+        self.name = name
+        self.prepare = prepare
+        self.mutates = mutates
+
+
+def _add_entity(spec, rng, database_path):
+    # add-project renders the department listing, prompts for a department,
+    # inserts through add_entity and then re-renders the projects table
+    return ['add-project', '--name', 'Benchmark'], f"{department_name(0)}\n", 1
+
+
+def _display_entities(spec, rng, database_path):
+    return ['display-employees'], None, spec.employees
+
+
+def _add_employees_to_department(spec, rng, database_path):
+    count = max(1, spec.employees // 100)
+    start = rng.randint(1, spec.employees - count + 1)
+    department_id = rng.randint(1, spec.departments)
+    return ['add-employees-to-a-department', '--department-id', str(department_id),
+            '--ids', f"{start}-{start + count - 1}"], None, count
+
+
+def _assign_projects(spec, rng, database_path):
+    # The first department is the largest one when the organisation is skewed. Only
+    # its own projects are listed; the others would be rejected, not assigned.
+    with sqlite3.connect(database_path) as connection:
+        project_ids = [project_id for project_id, in connection.execute(
+            "SELECT id FROM projects WHERE department_id = 1 ORDER BY id"
+        )]
+    if not project_ids:
+        raise RuntimeError("Department 1 has no projects to assign")
+    return ['assign-projects-to-employees', '--department-id', '1', '--projects', format_id_ranges(project_ids),
+            '--mode', 'additive'], None, 1
+
+
+def _view_employee_info(spec, rng, database_path):
+    return ['view-my-info'], f"{rng.randint(1, spec.employees)}\n", 1
+
+
+def _display_projects_by_departments(spec, rng, database_path):
+    return ['display-projects-by-departments'], None, spec.projects
+
+
+def _run_batch(spec, rng, database_path):
+    # A reorg script: 100 moves, hires and new heads in one transaction
+    lines = []
+    for _ in range(100):
+        department = department_name(rng.randrange(spec.departments))
+        start = rng.randint(1, spec.employees - 9)
+        lines.append(json.dumps({'op': 'move-employees', 'ids': f"{start}-{start + 9}", 'department': department}))
+        lines.append(json.dumps({'op': 'add-employee', 'name': 'Benchmark', 'department': department}))
+        lines.append(json.dumps({'op': 'set-head', 'department': department, 'employee': start}))
+    return ['run-batch', '-'], '\n'.join(lines) + '\n', len(lines)
+
+
+SCENARIOS = [
+    Scenario('add_entity', _add_entity, mutates=True),
+    Scenario('display_entities', _display_entities),
+    Scenario('add_employees_to_department', _add_employees_to_department, mutates=True),
+    Scenario('assign_projects_to_employees_in_department', _assign_projects, mutates=True),
+    Scenario('view_employee_info', _view_employee_info),
+    Scenario('display_projects_by_departments', _display_projects_by_departments),
+    Scenario('run_batch', _run_batch, mutates=True),
+]
+
+
+def run_cli(database_path, arguments, prompt_input):
+    """Run main.py once; returns (seconds, peak RSS in MiB).
+
+    Output is scanned as it is produced, and a run that reports a failure
+    raises instead of being timed as a normal sample.
+    """
+    environment = dict(os.environ, EMS_DATABASE_URI=f"sqlite:///{database_path}")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, 'main.py'] + arguments, cwd=ROOT, env=environment,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+    )
+    process.stdin.write((prompt_input or '').encode())
+    process.stdin.close()
+    failure = None
+    for line in process.stdout:
+        if failure is None and any(marker.encode() in line for marker in FAILURE_MARKERS):
+            failure = line.decode(errors='replace').strip()
+    process.stdout.close()
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - started
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f"main.py {' '.join(arguments)} exited with {process.returncode}")
+    if failure is not None:
+        raise RuntimeError(f"main.py {' '.join(arguments)} reported a failure: {failure}")
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return elapsed, usage.ru_maxrss / divisor
+
+
+def run_scenario(scenario, spec, database_path, iterations, rng):
+    latencies, peaks, rows = [], [], 0
+    for _ in range(iterations):
+        arguments, prompt_input, handled = scenario.prepare(spec, rng, database_path)
+        elapsed, peak = run_cli(database_path, arguments, prompt_input)
+        latencies.append(elapsed)
+        peaks.append(peak)
+        rows += handled
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        'iterations': iterations,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[max(0, round(0.95 * len(latencies)) - 1)] * 1000,
+        'mean_ms': total / iterations * 1000,
+        'ops_per_second': iterations / total,
+        'rows_per_second': rows / total,
+        'peak_rss_mib': max(peaks),
+    }
+
+
+def _environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+    }
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.option('--scale', 'scales', type=click.IntRange(1), multiple=True, default=[1000, 100_000], show_default=True,
+              help='Number of employees; repeat for several sizes, e.g. --scale 1000000.')
+@click.option('--iterations', type=click.IntRange(1), default=5, show_default=True)
+@click.option('--links-per-employee', type=click.FloatRange(0), default=2.0, show_default=True)
+@click.option('--skew', type=click.FloatRange(0), default=1.0, show_default=True)
+@click.option('--scenario', 'selected', type=click.Choice([s.name for s in SCENARIOS]), multiple=True,
+              help='Only run these scenarios.')
+@click.option('--seed', type=int, default=0, show_default=True)
+@click.option('-o', '--output', type=click.Path(dir_okay=False, writable=True), help='Write the results as JSON.')
+def run(scales, iterations, links_per_employee, skew, selected, seed, output):
+    """Generate each organisation size and time every scenario against it."""
+    results = {'environment': _environment(), 'scales': {}}
+    for scale in scales:
+        spec = OrganizationSpec(employees=scale, links_per_employee=links_per_employee, skew=skew, seed=seed)
+        with tempfile.TemporaryDirectory() as directory:
+            pristine = os.path.join(directory, 'pristine.db')
+            click.echo(f"Generating {scale} employees...")
+            generate_organization(pristine, spec)
+
+            scale_results = {}
+            for scenario in SCENARIOS:
+                if selected and scenario.name not in selected:
+                    continue
+                # Mutating scenarios get their own copy so they do not skew the others
+                database_path = pristine
+                if scenario.mutates:
+                    database_path = os.path.join(directory, f"{scenario.name}.db")
+                    with sqlite3.connect(pristine) as source, sqlite3.connect(database_path) as target:
+                        source.backup(target)
+
+                result = run_scenario(scenario, spec, database_path, iterations, random.Random(seed))
+                scale_results[scenario.name] = result
+                click.echo(
+                    f"  {scenario.name}: p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+                    f"{result['rows_per_second']:,.0f} rows/s, peak RSS {result['peak_rss_mib']:.1f} MiB"
+                )
+            results['scales'][str(scale)] = scale_results
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+@cli.command()
+@click.argument('baseline', type=click.File('r'))
+@click.argument('current', type=click.File('r'))
+@click.option('--metric', type=click.Choice(['p50_ms', 'p95_ms', 'mean_ms', 'peak_rss_mib']), default='p50_ms',
+              show_default=True)
+def compare(baseline, current, metric):
+    """Show the relative change of each scenario between two result files."""
+    baseline, current = json.load(baseline), json.load(current)
+    for scale, scenarios in current['scales'].items():
+        click.echo(f"{scale} employees:")
+        for name, result in scenarios.items():
+            before = baseline['scales'].get(scale, {}).get(name)
+            if before is None or not before[metric]:
+                click.echo(f"  {name}: {result[metric]:.1f} (no baseline)")
+                continue
+            change = (result[metric] - before[metric]) / before[metric] * 100
+            colour = 'red' if change > 10 else 'green' if change < -10 else None
+            click.secho(f"  {name}: {before[metric]:.1f} -> {result[metric]:.1f} ({change:+.1f}%)", fg=colour)
+
+
+if __name__ == '__main__':
+    cli()
@@ -1,20 +1,27 @@
+import importlib.util
 import sys
 import click
-from tabulate import tabulate
-from app.models import Department, Employee, Project
-from app.models import Base
-from app.database import session, engine
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import joinedload
-
-# Create tables in the database
-Base.metadata.create_all(bind=engine)
-
-def echo_error(message):
-    click.secho(message, fg='red')
-
-def echo_success(message):
-    click.secho(message, fg='green')
+from app import profiling
+from app.constants import (
+    ASSIGNMENT_MODES, DEFAULT_PAGE_SIZE, DEFAULT_PARTITION_SIZE, EMPLOYEE_REMOVAL_POLICIES, IMPORTABLE_ENTITY_TYPES, PROJECT_REMOVAL_POLICIES,
+    SEARCH_KINDS,
+)
+from app.ids import parse_id_list
+from app.output import DEFAULT_FORMAT, OUTPUT_FORMATS
+
+
+def lazy_import(name):
+    # The module (and SQLAlchemy, the models and tabulate behind it) is only loaded
+    # when one of its attributes is first used, so `--help` starts quickly
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+commands = lazy_import('app.commands')
 
 def validate_name(ctx, param, value):
     if not value:
@@ -23,6 +30,15 @@ def validate_name(ctx, param, value):
         raise click.BadParameter('Name should only contain alphabets.')
     return value
 
+def validate_optional_name(ctx, param, value):
+    return value if value is None else validate_name(ctx, param, value)
+
+def prompt_name(kind, name, ids, pattern):
+    # Only ask for a name when the command was not given another way to select rows
+    if name is None and ids is None and pattern is None:
+        name = click.prompt(f'Enter {kind} name', value_proc=lambda value: validate_name(None, None, value))
+    return name
+
 def validate_positive_int(ctx, param, value):
     if not value:
         raise click.BadParameter('ID cannot be empty.')
@@ -33,385 +49,289 @@ def validate_positive_int(ctx, param, value):
         return int_value
     except ValueError:
         raise click.BadParameter('ID should be a positive integer.')
-    
 
-def add_entity(entity, name, **kwargs):
-    try:
-        new_entity = entity(name=name, **kwargs)
-        session.add(new_entity)
-        session.commit()
-        echo_success(f"Added {entity.__name__.lower()}: {name}")
-        display_entities(entity)
-        return new_entity  # Return the newly added entity
-    except IntegrityError as ie:
-        session.rollback()  # Rollback the session to avoid leaving the transaction open
-        echo_error(f"IntegrityError: {str(ie)}")
-        echo_error(f"{entity.__name__.lower()} with name '{name}' already exists. Please choose a different name.")
-        return None  # Return None on IntegrityError
-    except Exception as e:
-        session.rollback()  # Rollback the session in case of other exceptions
-        echo_error(f"Error adding {entity.__name__.lower()}: {str(e)}")
-        return None  # Return None on other exceptions
-
-# Remove Entity Function
-def remove_entity(entity, name, prompt_id=False):
-    try:
-        if prompt_id:
-            entity_id = click.prompt(f'Enter the ID of the {entity.__name__.lower()} to remove', type=click.IntRange(1))
-            entity_instance = session.query(entity).filter_by(id=entity_id).first()
-        else:
-            entity_instance = session.query(entity).filter_by(name=name).first()
-
-        if entity_instance:
-            session.delete(entity_instance)
-            session.commit()
-            echo_success(f"Removed {entity.__name__.lower()}: {entity_instance.name}")
-            display_entities(entity)
-        else:
-            echo_error(f"{entity.__name__.lower()} with name '{name}' not found")
-    except Exception as e:
-        echo_error(f"Error removing {entity.__name__.lower()}: {str(e)}")
-
-def display_entities(entity):
+def validate_id_list(value):
+    if value is None:
+        return None
     try:
-        entities = session.query(entity).all()
-        if entities:
-            headers = ["ID", "Name"]
-            data = [(entity_instance.id, entity_instance.name) for entity_instance in entities]
-            click.echo(tabulate(data, headers=headers, tablefmt="grid", numalign="center"))
-        else:
-            click.echo(f"No {entity.__name__.lower()}s found")
-    except Exception as e:
-        echo_error(f"Error displaying {entity.__name__.lower()}s: {str(e)}")
-
-def get_available_employees():
-    return session.query(Employee).filter(Employee.department_id.is_(None)).all()
-
-def add_employees_to_department():
-    try:
-        # Display the departments table for the user to select
-        departments = session.query(Department).all()
-        if not departments:
-            click.echo("No departments found. Please add a department first.")
-            return
-
-        headers = ["ID", "Name"]
-        data = [(department.id, department.name) for department in departments]
-        click.echo(tabulate(data, headers=headers, tablefmt="grid", numalign="center"))
-
-        # Prompt user to select a department
-        department_id = click.prompt('Choose a department ID to add employees to', type=int)
-        department = session.query(Department).filter_by(id=department_id).first()
-
-        if not department:
-            click.secho(f"Department with ID {department_id} not found.", fg='red')
-            return
-
-        # Filter employees not assigned to any departments
-        available_employees = (
-            session.query(Employee)
-            .filter(Employee.department_id.is_(None))
-            .options(joinedload(Employee.projects))
-            .all()
-        )
-
-        if not available_employees:
-            click.secho("No available employees to add to the department.", fg='red')
-            return
-
-        # Display the table of employees not assigned to any departments
-        headers = ["ID", "Name", "Projects"]
-        data = [(employee.id, employee.name, ', '.join([project.name for project in employee.projects])) for employee in available_employees]
-        click.echo(tabulate(data, headers=headers, tablefmt="grid", numalign="center"))
-
-        # Prompt user to select employee IDs to add (comma-separated)
-        employee_ids_str = click.prompt('Enter the IDs of the employees to add (comma-separated)', type=str)
-        employee_ids = [int(e_id) for e_id in employee_ids_str.split(',') if e_id.isdigit()]
-
-        # Add selected employees to the department
-        for employee_id in employee_ids:
-            employee = session.query(Employee).filter_by(id=employee_id).first()
-            if employee:
-                employee.department_id = department.id
-            else:
-                click.secho(f"Employee with ID {employee_id} not found.", fg='red')
-
-        session.commit()
-
-        click.secho(f"Employees added to department {department.name}", fg='green')
-
-    except Exception as e:
-        click.secho(f"Error adding employees to department: {str(e)}", fg='red')
-   
+        return parse_id_list(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+def pagination_options(command):
+    command = click.option('--limit', type=click.IntRange(1), help='Maximum number of rows to show.')(command)
+    command = click.option('--after-id', type=click.IntRange(0), help='Only show rows with an ID greater than this.')(command)
+    command = click.option('--page-size', type=click.IntRange(1), default=DEFAULT_PAGE_SIZE, show_default=True, help='Rows fetched and printed at a time.')(command)
+    return command
+
+def removal_options(command):
+    command = click.option('--yes', 'assume_yes', is_flag=True, help='Do not ask for confirmation when removing by --ids or --name-pattern.')(command)
+    command = click.option('--name-pattern', 'pattern', help='Remove every name matching this case-sensitive wildcard pattern, e.g. "Temp*".')(command)
+    command = click.option('--ids', callback=lambda ctx, param, value: validate_id_list(value), help='Remove these IDs and ranges, e.g. 4,10-20.')(command)
+    command = click.option('--name', callback=validate_optional_name, help='Prompted for when neither --ids nor --name-pattern is given.')(command)
+    return command
+
+def close_session():
+    # Only touch the session if a command actually loaded the database layer
+    database = sys.modules.get('app.database')
+    if database is not None:
+        database.session.remove()
 
-def display_employees_in_department(department_name):
-    try:
-        department = session.query(Department).filter_by(name=department_name).first()
-        if department:
-            employees = department.employees
-            if employees:
-                headers = ["Employee ID", "Employee Name"]
-                data = [(employee.id, employee.name) for employee in employees]
-                click.echo(tabulate(data, headers=headers, tablefmt="grid", numalign="center"))
-            else:
-                click.echo(f"No employees found in Department: {department_name}")
-        else:
-            click.echo(f"Department: {department_name} not found")
-    except Exception as e:
-        click.echo(f"Error displaying employees in department: {str(e)}")
-        
-
-def assign_projects_to_employees_in_department():
-    try:
-        # Display the departments table for the user to select
-        departments = session.query(Department).all()
-        if not departments:
-            click.echo("No departments found. Please add a department first.")
-            return
-
-        headers = ["ID", "Name"]
-        data = [(department.id, department.name) for department in departments]
-        click.echo(tabulate(data, headers=headers, tablefmt="grid", numalign="center"))
-
-        # Prompt user to select a department
-        department_id = click.prompt('Choose a department ID to assign projects to employees', type=int)
-        department = session.query(Department).filter_by(id=department_id).first()
-
-        if not department:
-            click.secho(f"Department with ID {department_id} not found.", fg='red')
-            return
-
-        # Display the projects table for the user to select
-        projects = session.query(Project).filter_by(department_id=department.id).all()
-
-        if not projects:
-            click.echo(f"No projects found in Department: {department.name}. Please add a project first.")
-            return
-
-        headers = ["ID", "Name"]
-        data = [(project.id, project.name) for project in projects]
-        click.echo(tabulate(data, headers=headers, tablefmt="grid", numalign="center"))
-
-        # Prompt user to select project IDs to assign (comma-separated)
-        project_ids_str = click.prompt('Enter the IDs of the projects to assign (comma-separated)', type=str)
-        project_ids = [int(p_id) for p_id in project_ids_str.split(',') if p_id.isdigit()]
-
-        # Assign selected projects to employees in the department
-        for project_id in project_ids:
-            project = session.query(Project).filter_by(id=project_id, department_id=department.id).first()
-            if project:
-                project.employees = department.employees
-            else:
-                click.secho(f"Project with ID {project_id} not found in Department: {department.name}.", fg='red')
-
-        session.commit()
-
-        click.secho(f"Projects assigned to employees in department {department.name}", fg='green')
-
-    except Exception as e:
-        click.secho(f"Error assigning projects to employees in department: {str(e)}", fg='red')
-        
-# Function to view the employee info
-def view_employee_info():
-    try:
-        # Prompt user to enter their employee ID
-        employee_id = click.prompt('Enter your employee ID', type=int)
-        employee = session.query(Employee).filter_by(id=employee_id).first()
-
-        if not employee:
-            echo_error(f"Employee with ID {employee_id} not found.")
-            return
-
-        # Display information about the employee's department
-        department = employee.department
-        if department:
-            echo_success(f"You are part of the '{department.name}' department.")
-
-            # Display projects assigned to the employee
-            projects = employee.projects
-            if projects:
-                headers = ["Project ID", "Project Name"]
-                data = [(project.id, project.name) for project in projects]
-                click.echo(tabulate(data, headers=headers, tablefmt="grid", numalign="center"))
-            else:
-                echo_success("You are not assigned to any projects.")
-        else:
-            echo_success("You are not assigned to any department.")
-
-    except Exception as e:
-        echo_error(f"Error viewing employee information: {str(e)}")
-    
-                
 @click.group()
-def cli():
-    pass
+@click.option('--format', 'output_format', type=click.Choice(OUTPUT_FORMATS), default=DEFAULT_FORMAT, show_default=True, help='How tables are written to stdout.')
+@click.option('--profile', is_flag=True, help='Print SQL statement and phase timings to stderr when the command finishes.')
+@click.option('--profile-json', type=click.Path(dir_okay=False, writable=True), help='Also save the profile as JSON to this file.')
+@click.pass_context
+def cli(ctx, output_format, profile, profile_json):
+    ctx.ensure_object(dict)
+    ctx.obj['format'] = output_format
+    # Commands run from `shell` share one session, which the shell itself owns
+    if not ctx.obj.get('shell'):
+        ctx.call_on_close(close_session)
+    if profile or profile_json:
+        profiling.start()
+        ctx.call_on_close(lambda: profiling.finish(profile_json))
+
+# Creating the database schema
+@cli.command()
+def init_db():
+    """Create any missing tables and indexes."""
+    commands.init_db()
 
 # Adding a Department
 @cli.command()
 @click.option('--name', prompt='Enter department name', callback=validate_name)
 def add_department(name):
-    try:
-        existing_department = session.query(Department).filter_by(name=name).first()
-        if existing_department:
-            echo_error(f"Department with name '{name}' already exists. Please choose a different name.")
-        else:
-            new_department = add_entity(Department, name)
-            if new_department:
-                add_employees_to_department(new_department)
-    except Exception as e:
-        echo_error(f"Error adding department: {str(e)}")
+    commands.add_department(name)
 
 # Removing a Department
 @cli.command()
-@click.option('--name', prompt='Enter department name', callback=validate_name)
-def remove_department(name):
-    remove_entity(Department, name)
+@removal_options
+@click.option('--employees', type=click.Choice(EMPLOYEE_REMOVAL_POLICIES), default='detach', show_default=True, help="Leave the departments' employees without a department or move them to --reassign-to.")
+@click.option('--projects', type=click.Choice(PROJECT_REMOVAL_POLICIES), default='detach', show_default=True, help="Leave the departments' projects without a department, move them to --reassign-to or delete them.")
+@click.option('--reassign-to', type=click.IntRange(1), help='ID of the department that receives reassigned employees and projects.')
+def remove_department(name, ids, pattern, assume_yes, employees, projects, reassign_to):
+    name = prompt_name('department', name, ids, pattern)
+    commands.remove_entity(commands.Department, name, ids=ids, pattern=pattern, assume_yes=assume_yes,
+                           employees=employees, projects=projects, reassign_to=reassign_to)
 
 # Displaying Departments
 @cli.command()
-def display_departments():
-    display_entities(Department)
+@pagination_options
+def display_departments(**paging):
+    commands.display_entities(commands.Department, **paging)
 
 # Adding an Employee
 @cli.command()
 @click.option('--name', prompt='Enter employee name', callback=validate_name)
 def add_employee(name):
-    try:
-        departments = session.query(Department).all()
-
-        if not departments:
-            echo_error("No available departments to assign the employee to.")
-            add_entity(Employee, name)  # Add the employee without assigning to any department
-        else:
-            headers = ["ID", "Name"]
-            data = [(department.id, department.name) for department in departments]
-            click.echo(tabulate(data, headers=headers, tablefmt="grid", numalign="center"))
-
-            add_to_department = click.confirm('Do you want to add the employee to a department?', default=True)
-
-            if add_to_department:
-                department_name = click.prompt('Choose a department name to assign the employee to', type=str)
-
-                department = session.query(Department).filter_by(name=department_name).first()
-                if department:
-                    add_entity(Employee, name, department_id=department.id)
-                else:
-                    echo_error(f"Department '{department_name}' not found.")
-            else:
-                add_entity(Employee, name)  # Add the employee without assigning to any department
-
-    except Exception as e:
-        echo_error(f"Error adding employee: {str(e)}")
+    commands.add_employee(name)
 
 # Removing an Employee
 @cli.command()
 @click.option('--name', prompt='Enter employee name', callback=validate_name)
 def remove_employee(name):
-    remove_entity(Employee, name, prompt_id=True)
+    commands.remove_entity(commands.Employee, name, prompt_id=True)
 
 # Displaying Employees
 @cli.command()
-def display_employees():
-    display_entities(Employee)
+@pagination_options
+def display_employees(**paging):
+    commands.display_entities(commands.Employee, **paging)
 
 # Adding a Project
 @cli.command()
 @click.option('--name', prompt='Enter project name', callback=validate_name)
 def add_project(name):
-    try:
-        departments = session.query(Department).all()
-        if departments:
-            headers = ["ID", "Name"]
-            data = [(department.id, department.name) for department in departments]
-            click.echo(tabulate(data, headers=headers, tablefmt="grid", numalign="center"))
-            department_name = click.prompt('Choose a department name to assign the project to', type=str)
-            
-            department = session.query(Department).filter_by(name=department_name).first()
-            if department:
-                add_entity(Project, name, department_id=department.id)
-            else:
-                echo_error(f"Department '{department_name}' not found.")
-        else:
-            echo_error("No departments found. Please add a department first.")
-    except Exception as e:
-        echo_error(f"Error adding project: {str(e)}")
+    commands.add_project(name)
 
 # Removing a Project
 @cli.command()
-@click.option('--name', prompt='Enter project name', callback=validate_name)
-def remove_project(name):
-    remove_entity(Project, name, prompt_id=True)
+@removal_options
+def remove_project(name, ids, pattern, assume_yes):
+    name = prompt_name('project', name, ids, pattern)
+    commands.remove_entity(commands.Project, name, prompt_id=True, ids=ids, pattern=pattern, assume_yes=assume_yes)
 
 # Displaying Projects
 @cli.command()
-def display_projects():
-    display_entities(Project)
+@pagination_options
+def display_projects(**paging):
+    commands.display_entities(commands.Project, **paging)
 
 # Displaying Head of Departments and Their Departments
 @cli.command()
 def display_heads_of_departments():
-    try:
-        heads_of_departments = session.query(Department).filter(Department.head_of_department_id.isnot(None)).all()
-        if heads_of_departments:
-            headers = ["Head of Department", "Department Name"]
-            data = [(head_of_department.head_of_department.name if head_of_department.head_of_department else None, head_of_department.name) for head_of_department in heads_of_departments]
-            click.echo(tabulate(data, headers=headers, tablefmt="grid", numalign="center"))
-        else:
-            click.echo("No head of departments found")
-    except Exception as e:
-        echo_error(f"Error displaying heads of departments: {str(e)}")
+    commands.display_heads_of_departments()
 
 # Displaying Employees in a Certain Department
 @cli.command()
 @click.option('--department_name', prompt='Enter department name', type=str, callback=validate_name)
 def display_employees_in_department(department_name):
-    try:
-        department = session.query(Department).filter_by(name=department_name).first()
-        if department:
-            employees = department.employees
-            if employees:
-                headers = ["Employee ID", "Employee Name"]
-                data = [(employee.id, employee.name) for employee in employees]
-                click.echo(tabulate(data, headers=headers, tablefmt="grid", numalign="center"))
-            else:
-                echo_success(f"No employees found in Department: {department_name}")
-        else:
-            echo_error(f"Department: {department_name} not found")
-    except Exception as e:
-        echo_error(f"Error displaying employees in department: {str(e)}")
+    commands.display_employees_in_department(department_name)
 
 # Displaying Projects Being Worked on by Departments
 @cli.command()
-def display_projects_by_departments():
-    try:
-        departments = session.query(Department).all()
-        if departments:
-            headers = ["Department Name", "Project Name"]
-            data = []
-            for department in departments:
-                for project in department.projects:
-                    data.append((department.name, project.name))
-            click.echo(tabulate(data, headers=headers, tablefmt="grid", numalign="center"))
-        else:
-            echo_success("No departments found")
-    except Exception as e:
-        echo_error(f"Error displaying projects by departments: {str(e)}")
+@pagination_options
+def display_projects_by_departments(**paging):
+    commands.display_projects_by_departments(**paging)
+
+# Displaying Employee-Project Assignments
+@cli.command()
+@click.option('--page-size', type=click.IntRange(1), default=DEFAULT_PAGE_SIZE, show_default=True, help='Rows fetched and printed at a time.')
+@click.option('--limit', type=click.IntRange(1), help='Maximum number of rows to show.')
+def display_assignments(page_size, limit):
+    commands.display_assignments(page_size, limit)
 
 # Add employees to a department
 @cli.command()
-def add_employees_to_a_department():
-    add_employees_to_department()
+@click.option('--department-id', type=click.IntRange(1), help='Skip the department prompt.')
+@click.option('--ids', callback=lambda ctx, param, value: validate_id_list(value), help='Employee IDs and ranges, e.g. 1-500,720. Skips the employee prompt.')
+@click.option('--ids-file', type=click.File('r'), help='File of employee IDs and ranges, separated by commas or newlines.')
+def add_employees_to_a_department(department_id, ids, ids_file):
+    if ids_file is not None:
+        ids = sorted(set(ids or []) | set(validate_id_list(ids_file.read().replace('\n', ','))))
+    commands.add_employees_to_department(department_id, ids)
     
 # Assign projects to employees in a department
 @cli.command()
-def assign_projects_to_employees():
-    assign_projects_to_employees_in_department()
+@click.option('--department-id', type=click.IntRange(1), help='Skip the department prompt.')
+@click.option('--projects', 'project_ids', callback=lambda ctx, param, value: validate_id_list(value), help='Project IDs and ranges, e.g. 1,4-7. Skips the project prompt.')
+@click.option('--mode', type=click.Choice(ASSIGNMENT_MODES), default='replace', show_default=True, help='Keep existing project members (additive) or replace them.')
+def assign_projects_to_employees(department_id, project_ids, mode):
+    commands.assign_projects_to_employees_in_department(department_id, project_ids, mode)
     
 # View the employee info
 @click.command()
 def view_my_info():
-    view_employee_info()    
+    commands.view_employee_info()    
 cli.add_command(view_my_info)  
-        
+
+# Bulk importing departments, employees or projects from a CSV/JSONL file
+@cli.command('bulk-import')
+@click.argument('entity_type', type=click.Choice(IMPORTABLE_ENTITY_TYPES))
+@click.argument('source', type=click.File('r'), default='-')
+@click.option('--input-format', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension, or csv for stdin.')
+@click.option('--batch-size', type=click.IntRange(1), default=1000, show_default=True, help='Rows inserted per transaction.')
+def bulk_import_command(entity_type, source, input_format, batch_size):
+    """Import rows with a `name` column (and `department` for employees/projects)."""
+    commands.import_entities(entity_type, source, input_format, batch_size)
+
+# Applying a batch of operations in one or a few transactions
+@cli.command('run-batch')
+@click.argument('source', type=click.File('r'), default='-')
+@click.option('--input-format', type=click.Choice(['jsonl', 'yaml']), help='Defaults to the file extension, or jsonl for stdin.')
+@click.option('--chunk-size', type=click.IntRange(1), help='Operations committed per transaction; by default the whole batch is one transaction.')
+@click.option('--dry-run', is_flag=True, help='Only validate the batch.')
+def run_batch(source, input_format, chunk_size, dry_run):
+    """Apply a file of add, remove, move, assign and set-head operations.
+
+    Every operation is validated before anything is written, so a batch with
+    a mistake in it changes nothing.
+    """
+    commands.run_operations(source, input_format, chunk_size, dry_run)
+
+# Searching by name
+@cli.command()
+@click.argument('query')
+@click.option('--kind', 'kinds', type=click.Choice(SEARCH_KINDS), multiple=True, help='Only search these kinds of names; repeatable.')
+@click.option('--fuzzy', is_flag=True, help='Tolerate typos by ranking names on shared letter sequences.')
+@click.option('--limit', type=click.IntRange(1), default=20, show_default=True)
+def search(query, kinds, fuzzy, limit):
+    """Find departments, employees and projects by (part of) their name."""
+    commands.search(query, kinds, fuzzy, limit)
+
+# Summary statistics kept up to date by triggers
+@cli.command()
+@click.option('--top', type=click.IntRange(0), default=0, show_default=True, help='Also list the employees on the most projects.')
+def stats(top):
+    """Show headcount and project load per department."""
+    commands.display_stats(top)
+
+@cli.command('rebuild-stats')
+def rebuild_stats():
+    """Recompute the summary tables from scratch."""
+    commands.rebuild_summary_tables()
+
+@cli.command('check-stats')
+@click.option('--repair', is_flag=True, help='Rebuild the summary tables if they are inconsistent.')
+def check_stats(repair):
+    """Compare the summary tables with the data they summarise."""
+    commands.check_summary_tables(repair)
+
+# Change log for incremental sync
+@cli.command()
+@click.option('--since', type=click.IntRange(0), default=0, show_default=True, help='Only show changes with a sequence number above this.')
+@click.option('--limit', type=click.IntRange(1), help='Maximum number of changes to show.')
+@click.option('--page-size', type=click.IntRange(1), default=DEFAULT_PAGE_SIZE, show_default=True, help='Changes fetched and written at a time.')
+@click.option('--latest', is_flag=True, help='Only print the latest sequence number, e.g. to start syncing after a full export.')
+def changes(since, limit, page_size, latest):
+    """Stream inserts, updates and deletes as JSON lines, oldest first."""
+    commands.display_changes(since, limit, page_size, latest)
+
+@cli.command('compact-changes')
+@click.option('--before', type=click.IntRange(0), help='Only compact entries up to this sequence number; defaults to all.')
+def compact_changes(before):
+    """Drop change log entries superseded by a later change to the same row."""
+    commands.compact_change_log(before)
+
+# Relationship analysis over an in-memory employee-project graph
+@cli.group()
+@click.option('--cache', 'cache_path', type=click.Path(dir_okay=False), envvar='EMS_GRAPH_CACHE',
+              help='Keep the graph in this memory-mapped file between runs; rebuilt when the data changes. [env: EMS_GRAPH_CACHE]')
+@click.pass_obj
+def analyze(obj, cache_path):
+    """Answer questions about who works with whom."""
+    obj['graph_cache'] = cache_path
+
+@analyze.command('co-members')
+@click.argument('employee_id', type=click.IntRange(1))
+@click.option('--limit', type=click.IntRange(1), default=20, show_default=True)
+@click.pass_obj
+def co_members(obj, employee_id, limit):
+    """Employees sharing a project with EMPLOYEE_ID, most shared projects first."""
+    commands.analyze_co_members(obj['graph_cache'], employee_id, limit)
+
+@analyze.command()
+@click.option('--min-projects', type=click.IntRange(1), default=1, show_default=True)
+@click.option('--limit', type=click.IntRange(1), default=20, show_default=True)
+@click.pass_obj
+def degree(obj, min_projects, limit):
+    """Employees on at least --min-projects projects, busiest first."""
+    commands.analyze_degrees(obj['graph_cache'], min_projects, limit)
+
+@analyze.command()
+@click.option('--limit', type=click.IntRange(1), default=20, show_default=True)
+@click.pass_obj
+def overlap(obj, limit):
+    """Pairs of departments whose employees share projects."""
+    commands.analyze_department_overlap(obj['graph_cache'], limit)
+
+# Parallel export and restore of the whole database
+@cli.command()
+@click.argument('directory', type=click.Path(file_okay=False))
+@click.option('--partition-size', type=click.IntRange(1), default=DEFAULT_PARTITION_SIZE, show_default=True, help='Rows per shard file.')
+@click.option('--workers', type=click.IntRange(1), help='Worker processes; defaults to the number of CPUs.')
+def export(directory, partition_size, workers):
+    """Write every table to compressed shards in DIRECTORY, plus a manifest."""
+    commands.export_database(directory, partition_size, workers)
+
+@cli.command()
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.argument('database', type=click.Path(dir_okay=False))
+@click.option('--workers', type=click.IntRange(1), help='Worker processes; defaults to the number of CPUs.')
+def restore(directory, database, workers):
+    """Load an export from DIRECTORY into the new database file DATABASE."""
+    commands.restore_database(directory, database, workers)
+
+# Interactive shell that keeps the engine and caches warm between commands
+@cli.command()
+@click.pass_obj
+def shell(obj):
+    """Run many commands in one process, with tab completion of names."""
+    if obj.get('shell'):
+        click.secho("Already in the shell.", fg='red')
+        return
+    commands.run_shell(cli)
+
 if __name__ == '__main__':
     cli()
\ No newline at end of file